@@ -1,3 +1,21 @@
-from .animator import Animator
-from .phero_animator import PheroAnimator
-from .ant_animator import AntAnimator
\ No newline at end of file
+import importlib
+
+# Public names and their submodules, imported on first access: the ctypes
+# engine (animators.engine) then loads without matplotlib, networkx and the
+# animators' logging setup, e.g. in every tools/batch.py worker
+_EXPORTS = {
+    'Animator': 'animator',
+    'PheroAnimator': 'phero_animator',
+    'AntAnimator': 'ant_animator',
+    'FrameSource': 'frame_source',
+    'LiveAnimator': 'live',
+    'SnapshotSubscriber': 'live',
+    'PheromoneHistory': 'history',
+    'Colony': 'engine',
+}
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
@@ -2,9 +2,12 @@ from matplotlib import pyplot as plt, animation
 from matplotlib.animation import FuncAnimation
 from typing import Optional, Tuple, List, Dict
 from abc import ABC, abstractmethod
+from .frame_source import FrameSource
+from .history import PheromoneHistory
 import networkx as nx
 import random
 import logging
+import os
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -22,6 +25,7 @@ MAX_WEIGHT = 2.0
 MIN_RADIUS = 0.0 # MINIMUM RADIUS FOR REPRESENTING ANT QUANTITY
 MAX_RADIUS = .125 # MAXIMUM RADIUS FOR REPRESENTING ANT QUANTITY
 PHERO_INIT = 1.0
+DATA_DIR = './data'
 NODE_OPTIONS = {
     'node_color': 'red',
     'node_size': 150,
@@ -34,10 +38,11 @@ EDGE_OPTIONS = {
 logger.info("Node options: {}".format(NODE_OPTIONS.keys()))
 logger.info("Edge options: {}".format(EDGE_OPTIONS.keys()))
 
-def graph_from_info(graph_info:dict)->nx.Graph:
+def graph_from_info(graph_info:dict, edges: bool = True)->nx.Graph:
     """
     Takes graph_info and initializes a networkx graph
     :param graph_info: dict containing nodes and edges
+    :param edges: add the complete n² edge set, False for positions only
     :return: nx.Graph object
     """
     nodes = graph_info['nodes']
@@ -48,6 +53,8 @@ def graph_from_info(graph_info:dict)->nx.Graph:
     for node, coords in nodes.items():
         G.add_node(node, pos=coords, color="red")
     logger.info(f"Added {len(nodes)} nodes to graph")
+    if not edges:
+        return G
 
     # Add edges
     for i, (x0, y0) in nodes.items():
@@ -74,7 +81,7 @@ def read_coords(lines:List[str], start: int)->Dict[int, Tuple[float, float]]:
         try:
             node, x, y = [val for val in line.split(' ') if val]
             nodes[int(node)] = (float(x), float(y))
-            logger.info(node, x, y)
+            logger.debug(f"{node} {x} {y}")
         except ValueError:
             if line == 'EOF':
                 logger.info("Finished reading node coordinates")
@@ -110,6 +117,27 @@ def read_tsp_file(path, type):
         
     return graph_info
 
+def triangular_index(i, j, n):
+    """
+    Maps 0-based city pairs (i < j) to their offset in the engines' triangular matrix
+    :param i: array of row cities
+    :param j: array of column cities, each greater than i
+    :param n: number of cities
+    :return: array of flat indices
+    """
+    return (i * (2 * n - i - 1)) // 2 + (j - i - 1)
+
+def count_iterations(directory: str) -> int:
+    """
+    Counts the per-iteration dumps ({iteration}.txt) in a data directory
+    :param directory: directory to scan
+    :return: number of iterations, 0 if the directory does not exist
+    """
+    if not os.path.isdir(directory):
+        return 0
+    return sum(1 for file in os.listdir(directory)
+               if file.endswith('.txt') and file.split('.')[0].isdigit())
+
 class Animator(ABC):
     def __init__(self, path: str):
         """
@@ -132,6 +160,21 @@ class Animator(ABC):
         self.max_pheromones = max(nx.get_edge_attributes(self.G, 'pheromones').values())
         self.min_pheromones = min(nx.get_edge_attributes(self.G, 'pheromones').values())
 
+        # 0-based endpoints of every graph edge, in self.G.edges order, and their
+        # position in the engines' triangular (i < j) pheromone layout
+        self.num_nodes = self.G.number_of_nodes()
+        edges = np.array(list(self.G.edges), dtype=np.int64).reshape(-1, 2) - 1
+        self.edge_u = edges.min(axis=1)
+        self.edge_v = edges.max(axis=1)
+        self.edge_index = triangular_index(self.edge_u, self.edge_v, self.num_nodes)
+
+        # Compact keyframe + delta pheromone history, if the engine wrote one
+        snapshot_dir = f'{DATA_DIR}/snapshots'
+        self.history = PheromoneHistory(snapshot_dir) if os.path.isdir(snapshot_dir) else None
+
+        # Iterations are decoded lazily and prefetched off the render thread
+        self.frames = FrameSource(self.load_frame, self.count_frames())
+
     def get_random_init(self)->Tuple[Dict[Tuple[int, int], float], Dict[Tuple[int, int], float]]:
         """
         Randomly inits pheromones and ants for the network
@@ -155,42 +198,51 @@ class Animator(ABC):
 
         self.draw_network()
 
+    def count_frames(self) -> int:
+        """
+        Number of iterations to animate: the engines' snapshot history when
+        present, else the legacy per-iteration dumps in ./data/ant_tours
+        """
+        if self.history is not None:
+            return len(self.history)
+        return count_iterations(f'{DATA_DIR}/ant_tours')
+
     def draw_network(self):
         return self._draw_network(self.G)
     
+    def load_frame(self, iteration):
+        """
+        Decodes everything needed to draw one iteration, called by self.frames
+        :param iteration: int of iteration to load
+        """
+        return self.load_info(iteration)
+
     def load_info(self, iteration):
         """
-        Loads ant and info information from ./data/ dir
+        Loads ant and info information from ./data/ dir.
+        Pheromones come from ./data/snapshots when present, else from the full matrix dumps.
+        Ant traffic needs the per-iteration tour dumps, which the engines do not write
         :param iteration: int of iteration to load
-        :return: dict of ant and info information
+        :return: (pheromones, ants) flat arrays aligned with self.G.edges, ants is None
+                 when the iteration has no tour dump
         """
-        with open(f'./data/ant_tours/{iteration}.txt', 'r') as f:
-            ants = f.readlines()
-        with open(f'./data/pheromones/{iteration}.txt', 'r') as f:
-            pheromones = f.readlines()
-        
-        ants = [line.strip() for line in ants]
-        pheromones = [line.strip().split(" ") for line in pheromones]
+        if self.history is not None:
+            phero = self.history.pheromones(iteration)[self.edge_index]
+        else:
+            pheromones = np.loadtxt(f'{DATA_DIR}/pheromones/{iteration}.txt', ndmin=2)
+            phero = pheromones[self.edge_u, self.edge_v]
 
-        ant_tours = [tour.split(" ") for tour in ants]
-        ant_tours = [[int(node) for node in tour] for tour in ant_tours]
+        tours_path = f'{DATA_DIR}/ant_tours/{iteration}.txt'
+        if not os.path.exists(tours_path):
+            return phero, None
+        ant_tours = np.loadtxt(tours_path, dtype=np.int64, ndmin=2)
 
-        phero, ants = {}, {}
+        # Count every step of every tour on its undirected edge
+        src, dst = ant_tours[:, :-1].ravel(), ant_tours[:, 1:].ravel()
+        tri = triangular_index(np.minimum(src, dst), np.maximum(src, dst), self.num_nodes)
+        traffic = np.bincount(tri, minlength=self.num_nodes * (self.num_nodes - 1) // 2)
+        ants = traffic[self.edge_index]
 
-        for edge in self.G.edges:
-            u, v = edge
-            phero[edge] = float(pheromones[u-1][v-1])
-            ants[edge] = 0
-
-        for i in range(len(ant_tours)):
-            for j in range(len(ant_tours[i])-1):
-                edge = (ant_tours[i][j]+1, ant_tours[i][j+1]+1)
-                try:
-                    ants[edge] += 1
-                except KeyError:
-                    edge = edge[::-1]
-                    ants[edge] += 1
-        
         return phero, ants
     
     @abstractmethod
@@ -1,4 +1,3 @@
-import os
 import logging
 import random
 import numpy as np
@@ -11,8 +10,7 @@ from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 from matplotlib.animation import FuncAnimation
 from typing import List
 
-from animator import Animator
-from animators.types import AntTours
+from .animator import Animator, DATA_DIR, count_iterations
 
 # Initialize Logger
 logger = logging.getLogger(__name__)
@@ -42,7 +40,6 @@ class AntAnimator(Animator):
     def __init__(self, path: str):
         """Initialize the AntAnimator."""
         super().__init__(path)
-        self.ant_tours : list[AntTours] = self._read_ant_paths()
         self.pos = {}  # Stores node positions
 
         self.ant_artists = []
@@ -62,24 +59,18 @@ class AntAnimator(Animator):
         
         return Image.fromarray(data)
 
-    def _read_ant_paths(self) -> List[AntTours]:
-        """Read and parse ant tour paths from text files.
+    def count_frames(self) -> int:
+        # Ants are drawn from the tour dumps alone
+        return count_iterations(f"{DATA_DIR}/ant_tours")
+
+    def load_frame(self, iteration: int) -> np.ndarray:
+        """Read and parse the ant tours of one iteration.
         
         Returns:
-            List of ant tours, each tour is a list of paths.
-            Each path is a list of node indices.
+            Array of shape (ants, cities), each row is the node indices
+            visited by one ant.
         """
-        ant_tours = []
-        tour_dir = "data/ant_tours"
-
-        for file in sorted(os.listdir(tour_dir), key=lambda x: int(x.split('.')[0]))[:3]:
-            if file.endswith(".txt"):
-                with open(os.path.join(tour_dir, file), "r") as f:
-                    paths = [list(map(int, line.strip().split())) for line in f.readlines()]
-                    ant_tours.append(paths)
-
-        logger.info(f"Loaded {len(ant_tours)} ant tours.")
-        return ant_tours
+        return np.loadtxt(f"{DATA_DIR}/ant_tours/{iteration}.txt", dtype=np.int64, ndmin=2)
 
     def _draw_network(self, G: nx.Graph):
         """Draw the network graph."""
@@ -112,7 +103,7 @@ class AntAnimator(Animator):
 
         positions = []
         orientations = []
-        for tour in self.ant_tours[iteration]:
+        for tour in self.frames[iteration]:
             N = len(tour)
             start_city = tour[j] + 1
             next_city = tour[(j + 1) % N] + 1
@@ -142,7 +133,7 @@ class AntAnimator(Animator):
 
     def get_graph_animation(self):
         """Generate and return the animation object."""
-        iterations = len(self.ant_tours)
+        iterations = len(self.frames)
         frames = FPM * self.G.number_of_nodes() * iterations
 
         return FuncAnimation(
@@ -0,0 +1,183 @@
+from typing import Optional
+import ctypes
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LIB_PATH = os.environ.get('ACO_LIB', os.path.join(os.path.dirname(__file__), '..', 'src', 'libaco.so'))
+
+_libs = {}
+
+def load_library(path: str = LIB_PATH) -> ctypes.CDLL:
+    """
+    Loads the shared engine built from src/libaco.c and declares its signatures
+    :param path: path of libaco.so, $ACO_LIB or src/libaco.so by default
+    :return: ctypes.CDLL
+    """
+    path = os.path.abspath(path)
+    if path in _libs:
+        return _libs[path]
+    lib = ctypes.CDLL(path)
+    c_double_p = ctypes.POINTER(ctypes.c_double)
+
+    lib.aco_create.restype = ctypes.c_void_p
+    lib.aco_create.argtypes = [ctypes.c_int, c_double_p, c_double_p, ctypes.c_int,
+                               ctypes.c_double, ctypes.c_double, ctypes.c_double, ctypes.c_double,
+                               ctypes.c_uint]
+    lib.aco_free.argtypes = [ctypes.c_void_p]
+    lib.aco_run.restype = ctypes.c_int
+    lib.aco_run.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.aco_elem_size.restype = ctypes.c_int
+    real_p = ctypes.POINTER(ctypes.c_float if lib.aco_elem_size() == 4 else ctypes.c_double)
+    lib.aco_pheromones.restype = real_p
+    lib.aco_pheromones.argtypes = [ctypes.c_void_p]
+    lib.aco_matrix_dim.restype = ctypes.c_long
+    lib.aco_matrix_dim.argtypes = [ctypes.c_void_p]
+    lib.aco_best_tour.restype = ctypes.POINTER(ctypes.c_int)
+    lib.aco_best_tour.argtypes = [ctypes.c_void_p]
+    lib.aco_seeds.restype = ctypes.POINTER(ctypes.c_uint)
+    lib.aco_seeds.argtypes = [ctypes.c_void_p]
+    lib.aco_best_cost.restype = ctypes.c_double
+    lib.aco_best_cost.argtypes = [ctypes.c_void_p]
+    lib.aco_iteration.restype = ctypes.c_int
+    lib.aco_iteration.argtypes = [ctypes.c_void_p]
+    lib.aco_set_state.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_double]
+
+    logger.info(f"Loaded {path} ({lib.aco_elem_size() * 8}-bit pheromones)")
+    _libs[path] = lib
+    return lib
+
+def read_tsp(path: str) -> np.ndarray:
+    """
+    Reads the coordinates of a TSPLIB EUC_2D instance, as the engines do
+    :param path: .tsp file
+    :return: (num_cities, 2) array of coordinates
+    """
+    with open(path) as f:
+        lines = f.read().splitlines()
+    start = next(i for i, line in enumerate(lines) if line.startswith('NODE_COORD_SECTION')) + 1
+    rows = [line.split() for line in lines[start:] if line.strip() and line.strip() != 'EOF']
+    return np.array([[float(x), float(y)] for _, x, y in rows])
+
+class _Handle:
+    def __init__(self, lib: ctypes.CDLL, colony: int):
+        """
+        Owns one engine colony. Every array viewing its buffers holds a reference,
+        so the colony is freed only once the last of them is gone.
+        """
+        self.lib = lib
+        self.colony = colony
+
+    def view(self, pointer, length: int) -> np.ndarray:
+        """
+        NumPy view on `length` elements of an engine buffer, keeping the colony alive
+        """
+        buffer = (pointer._type_ * length).from_address(ctypes.addressof(pointer.contents))
+        buffer._handle = self
+        return np.ctypeslib.as_array(buffer)
+
+    def __del__(self):
+        if self.colony:
+            self.lib.aco_free(self.colony)
+            self.colony = None
+
+class Colony:
+    def __init__(self, coords: np.ndarray, num_ants: int = 1024, alpha: float = 4.0, beta: float = 3.0,
+                 evaporation: float = 0.9, q: float = 100.0, seed: int = 0, lib_path: Optional[str] = None):
+        """
+        Ant System colony running in-process in the shared C engine.
+        `pheromones`, `best_tour` and `seeds` (the per-ant random streams) are
+        views on the engine's own buffers: they reflect every run() without
+        copying and can be written to, e.g. to restore a checkpoint with
+        set_state. The engine memory lives as long as the colony or any of
+        these arrays; after close() the colony itself can no longer be used.
+        :param coords: (num_cities, 2) array of city coordinates
+        :param num_ants: number of ants per iteration
+        :param alpha: pheromone exponent
+        :param beta: distance exponent
+        :param evaporation: fraction of pheromone evaporated per iteration
+        :param q: deposit constant
+        :param seed: seed of the per-ant random streams
+        :param lib_path: path of libaco.so
+        """
+        self._handle = None
+        self.lib = load_library(lib_path or LIB_PATH)
+        coords = np.ascontiguousarray(coords, dtype=np.float64)
+        x, y = np.ascontiguousarray(coords[:, 0]), np.ascontiguousarray(coords[:, 1])
+        self.num_cities = len(coords)
+        self.num_ants = num_ants
+        if self.num_cities < 3 or num_ants < 1:
+            raise ValueError(f"Invalid colony: {self.num_cities} cities, {num_ants} ants")
+        colony = self.lib.aco_create(self.num_cities, x.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+                                     y.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), num_ants,
+                                     alpha, beta, evaporation, q, seed)
+        if not colony:
+            raise MemoryError(f"Cannot allocate a colony of {self.num_cities} cities and {num_ants} ants")
+        self._handle = _Handle(self.lib, colony)
+
+        dim = self.lib.aco_matrix_dim(colony)
+        self.pheromones = self._handle.view(self.lib.aco_pheromones(colony), dim)
+        self.best_tour = self._handle.view(self.lib.aco_best_tour(colony), self.num_cities)
+        self.seeds = self._handle.view(self.lib.aco_seeds(colony), num_ants)
+
+    @classmethod
+    def from_tsp(cls, path: str, **kwargs) -> 'Colony':
+        return cls(read_tsp(path), **kwargs)
+
+    @property
+    def _colony(self) -> int:
+        if self._handle is None:
+            raise ValueError("Colony is closed")
+        return self._handle.colony
+
+    def run(self, iterations: int = 1) -> float:
+        """
+        Runs more iterations, continuing from the current state
+        :param iterations: number of iterations
+        :return: best tour length so far
+        """
+        if self.lib.aco_run(self._colony, iterations) != 0:
+            raise MemoryError(f"Cannot allocate the ants' scratch buffers for {self.num_cities} cities")
+        return self.best_cost
+
+    @property
+    def best_cost(self) -> float:
+        return self.lib.aco_best_cost(self._colony)
+
+    @property
+    def iteration(self) -> int:
+        return self.lib.aco_iteration(self._colony)
+
+    def get_state(self) -> dict:
+        """
+        Copy of everything a run depends on, for set_state
+        :return: dict with iteration, best_cost, pheromones, best_tour and seeds
+        """
+        return {'iteration': self.iteration, 'best_cost': self.best_cost, 'pheromones': self.pheromones.copy(),
+                'best_tour': self.best_tour.copy(), 'seeds': self.seeds.copy()}
+
+    def set_state(self, iteration: int, best_cost: float, pheromones: Optional[np.ndarray] = None,
+                  best_tour: Optional[np.ndarray] = None, seeds: Optional[np.ndarray] = None):
+        """
+        Restores a state saved by get_state, so run() continues exactly where
+        it was taken. Arrays left as None keep the values already in the views.
+        """
+        for view, values in ((self.pheromones, pheromones), (self.best_tour, best_tour), (self.seeds, seeds)):
+            if values is not None:
+                view[:] = values
+        self.lib.aco_set_state(self._colony, iteration, best_cost)
+
+    def close(self):
+        """
+        Releases the colony; the engine memory is freed once no array views it
+        """
+        self._handle = None
+        self.pheromones = self.best_tour = self.seeds = None
+
+    def __enter__(self) -> 'Colony':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, TypeVar
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+class FrameSource(Generic[T]):
+    def __init__(self, loader: Callable[[int], T], num_frames: int,
+                 cache_size: int = 16, prefetch: int = 4):
+        """
+        Lazily decodes animation frames with a bounded LRU cache.
+        A background thread keeps the `prefetch` iterations after the one
+        being rendered decoded, so playback only waits on disk after a seek.
+        :param loader: callable decoding one iteration
+        :param num_frames: number of iterations available
+        :param cache_size: maximum number of decoded iterations kept in memory
+        :param prefetch: number of iterations to decode ahead of the cursor
+        """
+        self.loader = loader
+        self.num_frames = num_frames
+        self.prefetch = prefetch
+        # The prefetch window must fit in the cache or it would evict itself
+        self.cache_size = max(cache_size, prefetch + 1)
+
+        self._cache: "OrderedDict[int, T]" = OrderedDict()
+        self._errors: Dict[int, Exception] = {}
+        self._cursor = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self._worker.start()
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def __getitem__(self, iteration: int) -> T:
+        """
+        Returns the decoded iteration, waiting only if it is not prefetched yet
+        """
+        if not 0 <= iteration < self.num_frames:
+            raise IndexError(f"Iteration {iteration} out of range [0, {self.num_frames})")
+
+        with self._cond:
+            if iteration != self._cursor:
+                self._cursor = iteration
+                self._cond.notify_all()
+            while iteration not in self._cache:
+                if iteration in self._errors:
+                    raise self._errors.pop(iteration)
+                logger.debug(f"Waiting for iteration {iteration}")
+                self._cond.wait()
+            self._cache.move_to_end(iteration)
+            return self._cache[iteration]
+
+    def close(self):
+        """
+        Stops the prefetching thread
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+
+    def _next_missing(self) -> int:
+        """
+        First iteration in the prefetch window that is neither cached nor failed, or -1
+        """
+        end = min(self._cursor + self.prefetch + 1, self.num_frames)
+        for iteration in range(self._cursor, end):
+            if iteration not in self._cache and iteration not in self._errors:
+                return iteration
+        return -1
+
+    def _prefetch_loop(self):
+        while True:
+            with self._cond:
+                iteration = self._next_missing()
+                while iteration < 0 and not self._closed:
+                    self._cond.wait()
+                    iteration = self._next_missing()
+                if self._closed:
+                    return
+
+            # Decode outside the lock so the render thread can keep reading the cache
+            try:
+                frame = self.loader(iteration)
+            except Exception as e:
+                logger.error(f"Failed to load iteration {iteration}: {e}")
+                with self._cond:
+                    self._errors[iteration] = e
+                    self._cond.notify_all()
+                continue
+
+            with self._cond:
+                self._cache[iteration] = frame
+                self._evict()
+                self._cond.notify_all()
+
+    def _evict(self):
+        """
+        Drops least recently used iterations outside the prefetch window until the cache fits
+        """
+        window = range(self._cursor, self._cursor + self.prefetch + 1)
+        stale = [iteration for iteration in self._cache if iteration not in window]
+        for iteration in stale[:max(len(self._cache) - self.cache_size, 0)]:
+            del self._cache[iteration]
@@ -0,0 +1,97 @@
+from typing import Optional, Tuple
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KEY_MAGIC = 0x59454b41   # "AKEY", see src/snapshot.h
+DELTA_MAGIC = 0x544c4441 # "ADLT"
+HEADER = np.dtype([('magic', '<i4'), ('num_cities', '<i4'), ('iteration', '<i4'), ('elem_size', '<i4')])
+ELEM_TYPES = {4: np.dtype('<f4'), 8: np.dtype('<f8')}
+DELTA_HEADER = np.dtype([('factor', '<f8'), ('lower', '<f8'), ('upper', '<f8'), ('count', '<i8')])
+DEPOSIT = np.dtype([('index', '<i8'), ('value', '<f8')])
+
+class PheromoneHistory:
+    def __init__(self, directory: str):
+        """
+        Reads the keyframe + delta pheromone history written by src/snapshot.h
+        :param directory: snapshot directory (SNAPSHOT_DIR)
+        """
+        self.directory = directory
+        self.keyframes = []
+        num_iterations = 0
+        for file in os.listdir(directory):
+            name, ext = os.path.splitext(file)
+            if ext not in ('.key', '.delta') or not name.isdigit():
+                continue
+            if ext == '.key':
+                self.keyframes.append(int(name))
+            num_iterations = max(num_iterations, int(name) + 1)
+        self.keyframes.sort()
+        self.num_iterations = num_iterations
+
+        # Last reconstructed iteration, so sequential playback replays a single delta
+        self._cached: Optional[Tuple[int, np.ndarray]] = None
+        logger.info(f"Found {num_iterations} iterations and {len(self.keyframes)} keyframes in {directory}")
+
+    def __len__(self) -> int:
+        return self.num_iterations
+
+    def _read(self, iteration: int, ext: str, magic: int) -> Tuple[np.ndarray, np.dtype]:
+        """
+        Reads a snapshot file and checks its header
+        :return: raw bytes after the header, pheromone dtype of the engine build
+        """
+        data = np.fromfile(os.path.join(self.directory, f'{iteration}.{ext}'), dtype=np.uint8)
+        header = data[:HEADER.itemsize].view(HEADER)[0]
+        if header['magic'] != magic or header['iteration'] != iteration:
+            raise ValueError(f"Corrupt snapshot {iteration}.{ext}")
+        return data[HEADER.itemsize:], ELEM_TYPES[int(header['elem_size'])]
+
+    def keyframe(self, iteration: int) -> np.ndarray:
+        """
+        Full triangular pheromone matrix stored at a keyframe
+        """
+        body, dtype = self._read(iteration, 'key', KEY_MAGIC)
+        return body.view(dtype).copy()
+
+    def apply_delta(self, pheromones: np.ndarray, iteration: int):
+        """
+        Replays one delta in place: uniform evaporation clamped to the engine's
+        trail bounds, then the deposited edges
+        """
+        body, _ = self._read(iteration, 'delta', DELTA_MAGIC)
+        header = body[:DELTA_HEADER.itemsize].view(DELTA_HEADER)[0]
+        deposits = body[DELTA_HEADER.itemsize:].view(DEPOSIT)[:header['count']]
+        # Evaporate in double and round back, as C does for `float *= double`,
+        # then clamp in double like the engine's comparisons
+        pheromones[:] = pheromones.astype(np.float64) * header['factor']
+        pheromones[:] = np.clip(pheromones.astype(np.float64), header['lower'], header['upper'])
+        pheromones[deposits['index']] = deposits['value']
+
+    def pheromones(self, iteration: int) -> np.ndarray:
+        """
+        Reconstructs the triangular pheromone matrix after `iteration`
+        by seeking to the nearest keyframe and replaying the deltas since
+        :param iteration: int of iteration to reconstruct
+        :return: flat array in the engines' getIndex layout
+        """
+        if not 0 <= iteration < self.num_iterations:
+            raise IndexError(f"Iteration {iteration} out of range [0, {self.num_iterations})")
+
+        start = max((k for k in self.keyframes if k <= iteration), default=None)
+        if start is None:
+            raise ValueError(f"No keyframe at or before iteration {iteration}")
+
+        if self._cached is not None and start <= self._cached[0] <= iteration:
+            current, pheromones = self._cached
+        else:
+            current, pheromones = start, self.keyframe(start)
+
+        for it in range(current + 1, iteration + 1):
+            self.apply_delta(pheromones, it)
+
+        # The cached matrix is replayed in place, callers get their own copy
+        self._cached = (iteration, pheromones)
+        return pheromones.copy()
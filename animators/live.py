@@ -0,0 +1,160 @@
+from .animator import Animator, NODE_OPTIONS, graph_from_info, read_tsp_file
+from matplotlib import pyplot as plt
+from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+from typing import NamedTuple, Optional
+import networkx as nx
+import logging
+import os
+import socket
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STREAM_MAGIC = 0x4e534341 # "ACSN", see src/stream.h
+HEADER = np.dtype([
+    ('magic', '<u4'), ('iteration', '<i4'), ('num_cities', '<i4'), ('num_edges', '<i4'),
+    ('best_cost', '<f8'), ('iter_best', '<f8'), ('iter_mean', '<f8'),
+])
+MAX_DATAGRAM = 1 << 22
+
+class Snapshot(NamedTuple):
+    iteration: int
+    best_cost: float
+    iter_best: float
+    iter_mean: float
+    best_tour: np.ndarray   # 0-based cities
+    edges: np.ndarray       # (num_edges, 2) 0-based city pairs
+    pheromones: np.ndarray  # (num_edges,) pheromone on each edge
+
+def parse_snapshot(data: bytes) -> Snapshot:
+    """
+    Decodes one datagram published by stream_publish in src/stream.h
+    :param data: raw datagram
+    :return: Snapshot
+    """
+    header = np.frombuffer(data, dtype=HEADER, count=1)[0]
+    if header['magic'] != STREAM_MAGIC:
+        raise ValueError("Not an ACO snapshot: bad magic {:#x}".format(header['magic']))
+    n, k = int(header['num_cities']), int(header['num_edges'])
+
+    offset = HEADER.itemsize
+    best_tour = np.frombuffer(data, dtype='<i4', count=n, offset=offset)
+    offset += 4 * n
+    edges = np.frombuffer(data, dtype='<i4', count=2 * k, offset=offset).reshape(2, k).T
+    offset += 8 * k
+    pheromones = np.frombuffer(data, dtype='<f8', count=k, offset=offset)
+
+    return Snapshot(int(header['iteration']), float(header['best_cost']),
+                    float(header['iter_best']), float(header['iter_mean']),
+                    best_tour, edges, pheromones)
+
+class SnapshotSubscriber:
+    def __init__(self, path: str):
+        """
+        Binds the Unix datagram socket the engines publish to (STREAM_PATH).
+        A background thread keeps the socket queue drained so the engine's
+        sends never fill it up; only the newest datagram is retained.
+        :param path: socket path
+        """
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(path)
+        self.sock.settimeout(0.1)
+        logger.info(f"Listening for snapshots on {path}")
+
+        self._latest: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._drain, daemon=True)
+        self._reader.start()
+
+    def _drain(self):
+        while not self._closed:
+            try:
+                data = self.sock.recv(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with self._lock:
+                self._latest = data
+
+    def latest(self) -> Optional[Snapshot]:
+        """
+        Returns the newest snapshot, every older one is dropped
+        :return: newest Snapshot, or None if nothing arrived since the last call
+        """
+        with self._lock:
+            data, self._latest = self._latest, None
+        return parse_snapshot(data) if data else None
+
+    def close(self):
+        self._closed = True
+        self._reader.join()
+        self.sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+class LiveAnimator(Animator):
+    def __init__(self, path: str, socket_path: str, fps: float = 5):
+        """
+        Redraws the best tour and strongest pheromone edges of a running engine.
+        Frames are polled at `fps`; snapshots published in between are dropped.
+        Only node positions are built: the edges to draw come with each snapshot,
+        and the ./data replay machinery of Animator is not needed.
+        """
+        self.path = path
+        self.tsp_info = read_tsp_file(path, 'tsp')
+        self.G = graph_from_info(self.tsp_info, edges=False)
+        self.fig, self.ax = plt.subplots()
+        self.iteration = 0
+        self.pos = nx.get_node_attributes(self.G, 'pos')
+
+        self.subscriber = SnapshotSubscriber(socket_path)
+        self.interval = 1000 / fps
+        self.snapshot: Optional[Snapshot] = None
+        self.coords = np.array([self.pos[node] for node in sorted(self.G.nodes)])
+
+    def update_network(self):
+        """
+        Keeps the last snapshot if the engine has not published a new one
+        """
+        snapshot = self.subscriber.latest()
+        if snapshot is not None:
+            self.snapshot = snapshot
+
+    def _draw_network(self, G: nx.Graph):
+        artists = [nx.draw_networkx_nodes(G, self.pos, ax=self.ax, **NODE_OPTIONS)]
+        if self.snapshot is None:
+            return artists
+
+        s = self.snapshot
+        tau = s.pheromones
+        alpha = np.interp(tau, [tau.min(), tau.max()], [0.05, 0.6]) if len(tau) else tau
+        trails = LineCollection(self.coords[s.edges], colors=plt.get_cmap('Blues')(0.8), linewidths=1)
+        trails.set_alpha(alpha)
+        self.ax.add_collection(trails)
+
+        loop = self.coords[np.append(s.best_tour, s.best_tour[0])]
+        tour, = self.ax.plot(loop[:, 0], loop[:, 1], color='red', linewidth=1.5)
+        return artists + [trails, tour]
+
+    def draw_update(self, frame):
+        self.update_network()
+        self.ax.clear()
+        artists = self.draw_network()
+        if self.snapshot is None:
+            self.ax.set_title("Waiting for engine...")
+        else:
+            s = self.snapshot
+            self.ax.set_title(f"Iteration {s.iteration} - best {s.best_cost:.1f} "
+                              f"(iter best {s.iter_best:.1f}, mean {s.iter_mean:.1f})")
+        return artists
+
+    def get_graph_animation(self):
+        return FuncAnimation(self.fig, self.draw_update, interval=self.interval,
+                             blit=False, cache_frame_data=False)
@@ -39,13 +39,13 @@ class PheroAnimator(Animator):
         super().__init__(path)
 
     def update_network(self,
-        pheromones: Dict[Tuple[int, int], float],
-        ants: Optional[Dict]):
+        pheromones: np.ndarray,
+        ants: Optional[np.ndarray]):
         """
         Updates the network with the new pheromone and ant values.
-        Both dictionaries are accessed by edge key e.g. (0, 1)
-        :param pheromones: dict of edge:pheromone values
-        :param ants: dict of edge:ant values
+        Both arrays are aligned with self.G.edges, as returned by load_info
+        :param pheromones: array of per-edge pheromone values
+        :param ants: array of per-edge ant traffic
         """
         # TODO: Implement update network
         # Update the network with new pheromone values
@@ -54,29 +54,27 @@ class PheroAnimator(Animator):
         #     # map width between 1 and 3 based on weight value
         # width = np.interp(weight, [self.min_weight, self.max_weight], [MIN_WEIGHT, MAX_WEIGHT])
         # Get edge color based on the red scale. white for 0 pheromones, red for max pheromones
-        self.min_pheromones = np.min(list(pheromones.values()))
-        self.max_pheromones = np.max(list(pheromones.values()))
-        
-        if ants:
-            self.min_ants = np.min(list(ants.values()))
-            self.max_ants = np.max(list(ants.values()))
+        self.min_pheromones = np.min(pheromones)
+        self.max_pheromones = np.max(pheromones)
+        alphas = np.interp(pheromones, [self.min_pheromones, self.max_pheromones], [MIN_ALPHA, MAX_ALPHA])
+
+        if ants is not None:
+            self.min_ants = np.min(ants)
+            self.max_ants = np.max(ants)
+            radii = np.interp(ants, [self.min_ants, self.max_ants], [MIN_RADIUS, MAX_RADIUS])
+        else:
+            radii = np.zeros(len(pheromones))
         
-        for key in self.G.edges:
+        for e, key in enumerate(self.G.edges):
             value = self.G.edges[key]
             # set edge_color, alpha, edge_width
-            alpha = np.interp(pheromones[key], [self.min_pheromones, self.max_pheromones], [MIN_ALPHA, MAX_ALPHA])
             normalised_width = np.interp(value['weight'], [self.min_weight, self.max_weight], [MIN_WEIGHT, MAX_WEIGHT])
-            new_pheromone = pheromones[key]
 
             # update edge values
-            self.G.edges[key]['pheromones'] = new_pheromone
-            self.G.edges[key]['alpha'] = alpha
+            self.G.edges[key]['pheromones'] = pheromones[e]
+            self.G.edges[key]['alpha'] = alphas[e]
             self.G.edges[key]['weight'] = normalised_width
-            
-            if ants:
-                self.G.edges[key]['ants'] = np.interp(ants[key], [self.min_ants, self.max_ants], [MIN_RADIUS, MAX_RADIUS])
-            else:
-                self.G.edges[key]['ants'] = 0
+            self.G.edges[key]['ants'] = radii[e]
         
         self.pos = nx.get_node_attributes(self.G, 'pos')
         self.edge_color = nx.get_edge_attributes(self.G, 'pheromones')
@@ -143,7 +141,7 @@ class PheroAnimator(Animator):
         Must return a sequence of Artist objects.
         """
         self.ax.clear()
-        phero, ants = self.load_info(iteration)
+        phero, ants = self.frames[iteration]
         self.update_network(pheromones=phero, ants=ants)
         
         # Draw nodes and edges
@@ -157,7 +155,7 @@ class PheroAnimator(Animator):
         """
         Creates and returns an animation object.
         """
-        ani = FuncAnimation(self.fig, self.draw_update, frames=40, interval=200, blit=False)
+        ani = FuncAnimation(self.fig, self.draw_update, frames=len(self.frames), interval=200, blit=False)
         return ani
 
 if __name__ == '__main__':
@@ -0,0 +1,168 @@
+/*
+ * Checkpoint/restart of the colony state.
+ *
+ *   int32 magic, num_cities, iteration, sizeof(real_t)
+ *   uint32 seed, pad
+ *   double best_cost
+ *   int32 best_tour[NUM_CITIES]
+ *   real_t pheromones[MATRIX_DIM]
+ *
+ * `iteration` is the next iteration to run. The engines reseed rand() at the
+ * start of every iteration from (seed, iteration, rank), so the seed is the
+ * whole RNG state and a resumed run continues the original random sequence.
+ *
+ * In the MPI engines (included after mpi.h) every rank holds the same
+ * pheromones after the update, so each one writes its own slice of the matrix
+ * with a collective MPI-IO write, and rank 0 adds the header and best tour.
+ * On restart every rank reads the whole file, so the rank count may change.
+ * Checkpoints are written to <path>.tmp and renamed, so a run killed while
+ * writing keeps the previous checkpoint.
+ *
+ * The including engine must define NUM_CITIES, MATRIX_DIM and real_t.
+ */
+#ifndef CHECKPOINT_H
+#define CHECKPOINT_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+
+#define CHECKPOINT_MAGIC 0x4b434341 // "ACCK"
+
+typedef struct {
+    int32_t magic, num_cities, iteration, elem_size;
+    uint32_t seed, pad;
+    double best_cost;
+} CheckpointHeader;
+
+#define CHECKPOINT_TOUR_OFFSET ((long)sizeof(CheckpointHeader))
+#define CHECKPOINT_MATRIX_OFFSET (CHECKPOINT_TOUR_OFFSET + (long)NUM_CITIES * sizeof(int32_t))
+
+static CheckpointHeader checkpoint_header(int iteration, unsigned int seed, double best_cost) {
+    CheckpointHeader header = {CHECKPOINT_MAGIC, NUM_CITIES, iteration, (int32_t)sizeof(real_t), seed, 0, best_cost};
+    return header;
+}
+
+static void checkpoint_check(const CheckpointHeader *header, const char *path) {
+    if (header->magic != CHECKPOINT_MAGIC || header->num_cities != NUM_CITIES
+            || header->elem_size != (int32_t)sizeof(real_t)) {
+        fprintf(stderr, "Checkpoint %s does not match this build (%d cities, %d-byte pheromones)\n",
+                path, NUM_CITIES, (int)sizeof(real_t));
+        exit(EXIT_FAILURE);
+    }
+}
+
+#ifdef MPI_VERSION
+
+void checkpoint_write(const char *path, int iteration, unsigned int seed, double best_cost,
+                      const int *best_tour, const real_t *pheromones) {
+    char tmp[300];
+    int comm_size, comm_rank;
+    long first, last;
+    MPI_File file;
+
+    MPI_Comm_size(MPI_COMM_WORLD, &comm_size);
+    MPI_Comm_rank(MPI_COMM_WORLD, &comm_rank);
+    snprintf(tmp, sizeof(tmp), "%s.tmp", path);
+
+    if (MPI_File_open(MPI_COMM_WORLD, tmp, MPI_MODE_CREATE | MPI_MODE_WRONLY, MPI_INFO_NULL, &file) != MPI_SUCCESS) {
+        fprintf(stderr, "Error opening checkpoint %s\n", tmp);
+        MPI_Abort(MPI_COMM_WORLD, EXIT_FAILURE);
+    }
+    MPI_File_set_size(file, 0);
+
+    if (comm_rank == 0) {
+        CheckpointHeader header = checkpoint_header(iteration, seed, best_cost);
+        MPI_File_write_at(file, 0, &header, sizeof(header), MPI_BYTE, MPI_STATUS_IGNORE);
+        MPI_File_write_at(file, CHECKPOINT_TOUR_OFFSET, best_tour, NUM_CITIES, MPI_INT, MPI_STATUS_IGNORE);
+    }
+
+    // Each rank writes an equal slice of the (replicated) matrix
+    first = (long)MATRIX_DIM * comm_rank / comm_size;
+    last = (long)MATRIX_DIM * (comm_rank + 1) / comm_size;
+    MPI_File_write_at_all(file, CHECKPOINT_MATRIX_OFFSET + first * (long)sizeof(real_t), &pheromones[first],
+                          (int)((last - first) * sizeof(real_t)), MPI_BYTE, MPI_STATUS_IGNORE);
+    MPI_File_close(&file);
+
+    if (comm_rank == 0 && rename(tmp, path) != 0) {
+        perror("Error renaming checkpoint");
+        MPI_Abort(MPI_COMM_WORLD, EXIT_FAILURE);
+    }
+    MPI_Barrier(MPI_COMM_WORLD);
+}
+
+// Returns 0 if there is no checkpoint to resume from
+int checkpoint_read(const char *path, int *iteration, unsigned int *seed, double *best_cost,
+                    int *best_tour, real_t *pheromones) {
+    CheckpointHeader header;
+    MPI_File file;
+
+    if (MPI_File_open(MPI_COMM_WORLD, path, MPI_MODE_RDONLY, MPI_INFO_NULL, &file) != MPI_SUCCESS)
+        return 0;
+
+    MPI_File_read_at_all(file, 0, &header, sizeof(header), MPI_BYTE, MPI_STATUS_IGNORE);
+    checkpoint_check(&header, path);
+    MPI_File_read_at_all(file, CHECKPOINT_TOUR_OFFSET, best_tour, NUM_CITIES, MPI_INT, MPI_STATUS_IGNORE);
+    MPI_File_read_at_all(file, CHECKPOINT_MATRIX_OFFSET, pheromones, (int)(MATRIX_DIM * sizeof(real_t)),
+                         MPI_BYTE, MPI_STATUS_IGNORE);
+    MPI_File_close(&file);
+
+    *iteration = header.iteration;
+    *seed = header.seed;
+    *best_cost = header.best_cost;
+    return 1;
+}
+
+#else
+
+void checkpoint_write(const char *path, int iteration, unsigned int seed, double best_cost,
+                      const int *best_tour, const real_t *pheromones) {
+    char tmp[300];
+    CheckpointHeader header = checkpoint_header(iteration, seed, best_cost);
+    FILE *file;
+
+    snprintf(tmp, sizeof(tmp), "%s.tmp", path);
+    file = fopen(tmp, "wb");
+    if (!file) {
+        perror("Error opening checkpoint");
+        exit(EXIT_FAILURE);
+    }
+    fwrite(&header, sizeof(header), 1, file);
+    fwrite(best_tour, sizeof(int), NUM_CITIES, file);
+    fwrite(pheromones, sizeof(real_t), MATRIX_DIM, file);
+    if (fclose(file) != 0 || rename(tmp, path) != 0) {
+        perror("Error writing checkpoint");
+        exit(EXIT_FAILURE);
+    }
+}
+
+// Returns 0 if there is no checkpoint to resume from
+int checkpoint_read(const char *path, int *iteration, unsigned int *seed, double *best_cost,
+                    int *best_tour, real_t *pheromones) {
+    CheckpointHeader header;
+    FILE *file = fopen(path, "rb");
+
+    if (!file)
+        return 0;
+    if (fread(&header, sizeof(header), 1, file) != 1) {
+        fprintf(stderr, "Truncated checkpoint %s\n", path);
+        exit(EXIT_FAILURE);
+    }
+    checkpoint_check(&header, path);
+    if (fread(best_tour, sizeof(int), NUM_CITIES, file) != NUM_CITIES
+            || fread(pheromones, sizeof(real_t), MATRIX_DIM, file) != MATRIX_DIM) {
+        fprintf(stderr, "Truncated checkpoint %s\n", path);
+        exit(EXIT_FAILURE);
+    }
+    fclose(file);
+
+    *iteration = header.iteration;
+    *seed = header.seed;
+    *best_cost = header.best_cost;
+    return 1;
+}
+
+#endif
+
+#endif
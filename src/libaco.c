@@ -0,0 +1,267 @@
+/*
+ * Ant System as a shared library, for driving the engine in-process from Python
+ * (see animators/engine.py).
+ *
+ *   gcc -O3 -fopenmp -shared -fPIC -o libaco.so libaco.c -lm
+ *
+ * Unlike the standalone engines, the number of cities and the parameters are
+ * given at runtime. The colony owns its pheromone matrix (triangular, same
+ * getIndex layout as the engines) and best tour; aco_pheromones and
+ * aco_best_tour return pointers into them, so callers can read and overwrite
+ * the state without copies. Each ant draws from its own rand_r stream seeded
+ * from the colony seed, so runs are reproducible with any number of threads;
+ * aco_seeds exposes those streams so a restored state continues the same run.
+ *
+ * The library runs inside the caller's process, so it never exits: allocation
+ * failures are reported by aco_create returning NULL and aco_run returning -1.
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include <float.h>
+#include <string.h>
+#include <stdint.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#ifdef USE_FLOAT
+typedef float real_t;       // Single precision pheromones and distances
+#define PHERO_FLOOR FLT_MIN
+#else
+typedef double real_t;
+#define PHERO_FLOOR 0.0
+#endif
+
+#define IS_VISITED(v, c) (((v)[(c) >> 6] >> ((c) & 63)) & 1)
+#define SET_VISITED(v, c) ((v)[(c) >> 6] |= (uint64_t)1 << ((c) & 63))
+
+typedef struct {
+    int num_cities;
+    int num_ants;
+    double alpha, beta, evaporation, q;
+    long matrix_dim;
+    long *row_offset;       // getIndex(i, j) == row_offset[i] + j
+    real_t *distance;
+    real_t *pheromones;
+    int *tours;             // num_ants x num_cities
+    double *lengths;
+    unsigned int *seeds;    // One rand_r state per ant
+    int *best_tour;
+    double best_cost;
+    int iteration;
+} Colony;
+
+static long get_index(const Colony *c, int i, int j) {
+    return i < j ? c->row_offset[i] + j : c->row_offset[j] + i;
+}
+
+void aco_free(Colony *c) {
+    if (!c)
+        return;
+    free(c->row_offset);
+    free(c->distance);
+    free(c->pheromones);
+    free(c->tours);
+    free(c->lengths);
+    free(c->seeds);
+    free(c->best_tour);
+    free(c);
+}
+
+Colony *aco_create(int num_cities, const double *x, const double *y, int num_ants,
+                   double alpha, double beta, double evaporation, double q, unsigned int seed) {
+    Colony *c;
+    int i, j;
+
+    if (num_cities < 3 || num_ants < 1)
+        return NULL;
+
+    c = (Colony *)calloc(1, sizeof(Colony));
+    if (!c)
+        return NULL;
+    c->num_cities = num_cities;
+    c->num_ants = num_ants;
+    c->alpha = alpha;
+    c->beta = beta;
+    c->evaporation = evaporation;
+    c->q = q;
+    c->matrix_dim = ((long)num_cities * (num_cities - 1)) / 2;
+    c->row_offset = (long *)malloc(num_cities * sizeof(long));
+    c->distance = (real_t *)malloc(c->matrix_dim * sizeof(real_t));
+    c->pheromones = (real_t *)malloc(c->matrix_dim * sizeof(real_t));
+    c->tours = (int *)malloc((size_t)num_ants * num_cities * sizeof(int));
+    c->lengths = (double *)malloc(num_ants * sizeof(double));
+    c->seeds = (unsigned int *)malloc(num_ants * sizeof(unsigned int));
+    c->best_tour = (int *)malloc(num_cities * sizeof(int));
+    if (!c->row_offset || !c->distance || !c->pheromones || !c->tours || !c->lengths || !c->seeds || !c->best_tour) {
+        aco_free(c);
+        return NULL;
+    }
+    c->best_cost = DBL_MAX;
+    c->iteration = 0;
+
+    for (i = 0; i < num_cities; i++) {
+        c->row_offset[i] = ((long)i * (2 * num_cities - i - 1)) / 2 - i - 1;
+        c->best_tour[i] = i;
+    }
+    for (i = 0; i < num_cities; i++) {
+        for (j = i + 1; j < num_cities; j++) {
+            double dx = x[i] - x[j];
+            double dy = y[i] - y[j];
+            c->distance[c->row_offset[i] + j] = sqrt(dx * dx + dy * dy);
+            c->pheromones[c->row_offset[i] + j] = 1.0;
+        }
+    }
+    for (i = 0; i < num_ants; i++)
+        c->seeds[i] = seed * 2654435761u + i; // Distinct stream per ant
+    return c;
+}
+
+static int select_next_city(const Colony *c, int current_city, const uint64_t *visited,
+                            double *probabilities, unsigned int *seed) {
+    int i, last = -1;
+    double sum = 0.0, r, cumulative;
+
+    for (i = 0; i < c->num_cities; i++) {
+        probabilities[i] = 0.0;
+        if (!IS_VISITED(visited, i) && current_city != i) {
+            long idx = get_index(c, current_city, i);
+            probabilities[i] = pow(c->pheromones[idx], c->alpha) * pow(1.0 / c->distance[idx], c->beta);
+            sum += probabilities[i];
+            last = i;
+        }
+    }
+
+    // Roulette wheel selection
+    r = (double)rand_r(seed) / RAND_MAX * sum;
+    cumulative = 0.0;
+    for (i = 0; i < c->num_cities; i++) {
+        cumulative += probabilities[i];
+        if (probabilities[i] > 0.0 && r <= cumulative)
+            return i;
+    }
+    return last; // Rounding left r just above the total
+}
+
+static double construct_solution(const Colony *c, int ant, uint64_t *visited, double *probabilities) {
+    int *tour = &c->tours[(size_t)ant * c->num_cities];
+    unsigned int *seed = &c->seeds[ant];
+    int step, current_city, words = (c->num_cities + 63) / 64;
+    double length = 0.0;
+
+    memset(visited, 0, words * sizeof(uint64_t));
+    current_city = rand_r(seed) % c->num_cities;
+    tour[0] = current_city;
+    SET_VISITED(visited, current_city);
+
+    for (step = 1; step < c->num_cities; step++) {
+        int next_city = select_next_city(c, current_city, visited, probabilities, seed);
+        tour[step] = next_city;
+        SET_VISITED(visited, next_city);
+        length += c->distance[get_index(c, current_city, next_city)];
+        current_city = next_city;
+    }
+    return length + c->distance[get_index(c, current_city, tour[0])];
+}
+
+static void update_pheromones(Colony *c) {
+    long idx;
+    int i, k;
+
+    for (idx = 0; idx < c->matrix_dim; idx++) {
+        c->pheromones[idx] *= (1.0 - c->evaporation);
+        if (c->pheromones[idx] < PHERO_FLOOR)
+            c->pheromones[idx] = PHERO_FLOOR;
+    }
+
+    // Sequential deposit keeps the result independent of the thread count
+    for (k = 0; k < c->num_ants; k++) {
+        const int *tour = &c->tours[(size_t)k * c->num_cities];
+        double contribution = c->q / c->lengths[k];
+        for (i = 0; i < c->num_cities; i++)
+            c->pheromones[get_index(c, tour[i], tour[(i + 1) % c->num_cities])] += contribution;
+    }
+}
+
+// Runs `iterations` more iterations, returns 0, or -1 if the scratch buffers cannot be allocated
+int aco_run(Colony *c, int iterations) {
+    int iter, k, threads = 1, words = (c->num_cities + 63) / 64;
+    uint64_t *visited;
+    double *probabilities;
+
+#ifdef _OPENMP
+    threads = omp_get_max_threads();
+#endif
+    // One visited set and probability row per thread, allocated up front:
+    // an allocation failure inside the parallel region could not be reported
+    visited = (uint64_t *)malloc((size_t)threads * words * sizeof(uint64_t));
+    probabilities = (double *)malloc((size_t)threads * c->num_cities * sizeof(double));
+    if (!visited || !probabilities) {
+        free(visited);
+        free(probabilities);
+        return -1;
+    }
+
+    for (iter = 0; iter < iterations; iter++) {
+#ifdef _OPENMP
+        #pragma omp parallel for schedule(dynamic) num_threads(threads)
+#endif
+        for (k = 0; k < c->num_ants; k++) {
+            int t = 0;
+#ifdef _OPENMP
+            t = omp_get_thread_num();
+#endif
+            c->lengths[k] = construct_solution(c, k, &visited[(size_t)t * words],
+                                               &probabilities[(size_t)t * c->num_cities]);
+        }
+
+        for (k = 0; k < c->num_ants; k++) {
+            if (c->lengths[k] < c->best_cost) {
+                c->best_cost = c->lengths[k];
+                memcpy(c->best_tour, &c->tours[(size_t)k * c->num_cities], c->num_cities * sizeof(int));
+            }
+        }
+        update_pheromones(c);
+        c->iteration++;
+    }
+
+    free(visited);
+    free(probabilities);
+    return 0;
+}
+
+real_t *aco_pheromones(Colony *c) {
+    return c->pheromones;
+}
+
+long aco_matrix_dim(const Colony *c) {
+    return c->matrix_dim;
+}
+
+int *aco_best_tour(Colony *c) {
+    return c->best_tour;
+}
+
+// rand_r state of each ant, num_ants entries
+unsigned int *aco_seeds(Colony *c) {
+    return c->seeds;
+}
+
+double aco_best_cost(const Colony *c) {
+    return c->best_cost;
+}
+
+int aco_iteration(const Colony *c) {
+    return c->iteration;
+}
+
+// Restores the scalar state, e.g. after writing a checkpointed pheromone matrix, best tour and seeds
+void aco_set_state(Colony *c, int iteration, double best_cost) {
+    c->iteration = iteration;
+    c->best_cost = best_cost;
+}
+
+int aco_elem_size() {
+    return (int)sizeof(real_t);
+}
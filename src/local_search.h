@@ -0,0 +1,222 @@
+/*
+ * 2-opt + Or-opt local search applied to ant tours.
+ *
+ * 2-opt uses candidate neighbour lists (the NN_LIST nearest cities of each city)
+ * and don't-look bits, so a pass only examines O(NUM_CITIES * NN_LIST) moves.
+ * Or-opt then tries to move segments of 1 to 3 cities next to one of their
+ * neighbours; whenever it improves the tour, 2-opt runs again.
+ *
+ * The including engine must define NUM_CITIES, real_t and get_distance(i, j),
+ * and call local_search_init() once after init_tsp(). local_search() is
+ * reentrant, so it can run on several ants in parallel.
+ */
+#ifndef LOCAL_SEARCH_H
+#define LOCAL_SEARCH_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#ifndef NN_LIST
+#define NN_LIST 20          // Candidate neighbours per city
+#endif
+#define LS_EPSILON 1e-9     // Minimum gain for a move to count as an improvement
+
+#define LS_NONE 0           // Values of LOCAL_SEARCH
+#define LS_ALL 1            // Every ant's tour
+#define LS_BEST 2           // Only the iteration-best tour (per process in MPI runs)
+
+real_t get_distance(int i, int j);
+
+static int nn_size;
+static int *nn_list = NULL;  // nn_list[c * nn_size + k] is the k-th nearest city to c
+
+void local_search_init() {
+    int c;
+    nn_size = NN_LIST < NUM_CITIES - 1 ? NN_LIST : NUM_CITIES - 1;
+    nn_list = (int *)malloc((size_t)NUM_CITIES * nn_size * sizeof(int));
+    if (!nn_list) {
+        perror("Memory allocation failed");
+        exit(EXIT_FAILURE);
+    }
+
+#ifdef _OPENMP
+    #pragma omp parallel for schedule(dynamic, 16)
+#endif
+    for (c = 0; c < NUM_CITIES; c++) {
+        // Insertion into a sorted list of the nn_size nearest cities
+        int *list = &nn_list[c * nn_size];
+        double dist[NN_LIST];
+        int i, k, found = 0;
+        for (i = 0; i < NUM_CITIES; i++) {
+            double d;
+            if (i == c)
+                continue;
+            d = get_distance(c, i);
+            if (found == nn_size && d >= dist[found - 1])
+                continue;
+            k = found < nn_size ? found++ : found - 1;
+            while (k > 0 && dist[k - 1] > d) {
+                dist[k] = dist[k - 1];
+                list[k] = list[k - 1];
+                k--;
+            }
+            dist[k] = d;
+            list[k] = i;
+        }
+    }
+}
+
+void local_search_free() {
+    free(nn_list);
+    nn_list = NULL;
+}
+
+// Reverses tour[from..to] (cyclic positions), or the complementary segment if shorter
+static void ls_reverse(int *tour, int *pos, int from, int to) {
+    int len = ((to - from + NUM_CITIES) % NUM_CITIES) + 1;
+    int swaps, i, j, k, t;
+    if (2 * len > NUM_CITIES) {
+        // Reversing the rest of the cycle yields the same tour
+        k = from;
+        from = (to + 1) % NUM_CITIES;
+        to = (k - 1 + NUM_CITIES) % NUM_CITIES;
+        len = NUM_CITIES - len;
+    }
+    i = from;
+    j = to;
+    for (swaps = len / 2; swaps > 0; swaps--) {
+        t = tour[i];
+        tour[i] = tour[j];
+        tour[j] = t;
+        pos[tour[i]] = i;
+        pos[tour[j]] = j;
+        i = (i + 1) % NUM_CITIES;
+        j = (j - 1 + NUM_CITIES) % NUM_CITIES;
+    }
+}
+
+static void two_opt(int *tour, int *pos, char *dont_look) {
+    int improved = 1;
+
+    while (improved) {
+        int p;
+        improved = 0;
+        for (p = 0; p < NUM_CITIES; p++) {
+            int c1 = tour[p], dir, k, moved = 0;
+            if (dont_look[c1])
+                continue;
+
+            // dir 0: edges (c1, succ c1) and (c3, succ c3); dir 1: the predecessors
+            for (dir = 0; dir < 2 && !moved; dir++) {
+                int c2 = dir == 0 ? tour[(pos[c1] + 1) % NUM_CITIES]
+                                  : tour[(pos[c1] - 1 + NUM_CITIES) % NUM_CITIES];
+                double d12 = get_distance(c1, c2);
+
+                for (k = 0; k < nn_size; k++) {
+                    int c3 = nn_list[c1 * nn_size + k], c4;
+                    double d13 = get_distance(c1, c3), gain;
+                    if (d13 >= d12)
+                        break; // Neighbours are sorted: no further candidate can gain
+                    c4 = dir == 0 ? tour[(pos[c3] + 1) % NUM_CITIES]
+                                  : tour[(pos[c3] - 1 + NUM_CITIES) % NUM_CITIES];
+                    if (c4 == c1 || c3 == c2)
+                        continue;
+
+                    gain = d12 + get_distance(c3, c4) - d13 - get_distance(c2, c4);
+                    if (gain > LS_EPSILON) {
+                        if (dir == 0)
+                            ls_reverse(tour, pos, pos[c2], pos[c3]);
+                        else
+                            ls_reverse(tour, pos, pos[c1], pos[c4]);
+                        dont_look[c1] = dont_look[c2] = dont_look[c3] = dont_look[c4] = 0;
+                        moved = improved = 1;
+                        break;
+                    }
+                }
+            }
+            if (!moved)
+                dont_look[c1] = 1;
+        }
+    }
+}
+
+// Moves segments of 1 to 3 cities next to a neighbour, possibly reversed. Returns 1 if the tour improved.
+static int or_opt(int *tour, int *pos, char *dont_look, int *scratch) {
+    int improved = 0, p, len;
+
+    if (NUM_CITIES < 6)
+        return 0;
+
+    for (len = 1; len <= 3; len++) {
+        for (p = 0; p < NUM_CITIES; p++) {
+            int s1 = tour[p], s2 = tour[(p + len - 1) % NUM_CITIES];
+            int prev = tour[(p - 1 + NUM_CITIES) % NUM_CITIES];
+            int next = tour[(p + len) % NUM_CITIES];
+            double removal = get_distance(prev, s1) + get_distance(s2, next) - get_distance(prev, next);
+            int end, k;
+
+            for (end = 0; end < 2; end++) {
+                int s = end == 0 ? s1 : s2;
+                for (k = 0; k < nn_size; k++) {
+                    int c3 = nn_list[s * nn_size + k], c4, offset, reversed, i, n;
+                    double gain;
+                    if (get_distance(s, c3) >= removal)
+                        break;
+                    // c3 and its successor must lie outside the segment
+                    offset = (pos[c3] - p + NUM_CITIES) % NUM_CITIES;
+                    c4 = tour[(pos[c3] + 1) % NUM_CITIES];
+                    if (offset < len || (pos[c4] - p + NUM_CITIES) % NUM_CITIES < len)
+                        continue;
+
+                    // Insert between c3 and c4 as c3-s1..s2-c4, or reversed as c3-s2..s1-c4
+                    reversed = get_distance(c3, s2) + get_distance(s1, c4)
+                             < get_distance(c3, s1) + get_distance(s2, c4);
+                    gain = removal + get_distance(c3, c4)
+                         - (reversed ? get_distance(c3, s2) + get_distance(s1, c4)
+                                     : get_distance(c3, s1) + get_distance(s2, c4));
+                    if (gain <= LS_EPSILON)
+                        continue;
+
+                    // Rebuild the tour starting right after the segment
+                    n = 0;
+                    for (i = (p + len) % NUM_CITIES; i != p; i = (i + 1) % NUM_CITIES) {
+                        scratch[n++] = tour[i];
+                        if (tour[i] == c3) {
+                            int j;
+                            for (j = 0; j < len; j++)
+                                scratch[n++] = tour[(p + (reversed ? len - 1 - j : j)) % NUM_CITIES];
+                        }
+                    }
+                    memcpy(tour, scratch, NUM_CITIES * sizeof(int));
+                    for (i = 0; i < NUM_CITIES; i++)
+                        pos[tour[i]] = i;
+                    dont_look[prev] = dont_look[next] = dont_look[s1] = dont_look[s2] = 0;
+                    dont_look[c3] = dont_look[c4] = 0;
+                    improved = 1;
+                    goto next_segment;
+                }
+            }
+        next_segment:;
+        }
+    }
+    return improved;
+}
+
+// Improves a tour in place until it is 2-opt and Or-opt optimal w.r.t. the neighbour lists
+void local_search(int *tour) {
+    int pos[NUM_CITIES], scratch[NUM_CITIES];
+    char dont_look[NUM_CITIES];
+    int i;
+
+    for (i = 0; i < NUM_CITIES; i++) {
+        pos[tour[i]] = i;
+        dont_look[i] = 0;
+    }
+
+    do {
+        two_opt(tour, pos, dont_look);
+    } while (or_opt(tour, pos, dont_look, scratch));
+}
+
+#endif
@@ -5,29 +5,104 @@
 #include <float.h>
 #include <time.h>
 #include <string.h>
+#include <stdint.h>
 #include <mpi.h>
 
+#ifndef NUM_ANTS
 #define NUM_ANTS 1024        // [50, 800]
+#endif
+#ifndef NUM_ITERATIONS
 #define NUM_ITERATIONS 10
+#endif
 #define ALPHA 4.0           // [3.0, 5.0]
 #define BETA 3.0            // 3.0
 #define EVAPORATION 0.9     // [0.4, 1.0] - 0.8 - Dorigo et al. found 0.99 for TSP
 #define Q 100.0
+#ifndef NUM_CITIES
 #define NUM_CITIES 2048      // 783
+#endif
 #define MATRIX_DIM ((NUM_CITIES * (NUM_CITIES - 1)) / 2) // Triangular matrix size
-
-char* filename = "./pACO/tsplib/d15112.tsp";  //rat783
-double* distance;
-double* pheromones;
-double* local_contr;
-int visited[NUM_CITIES];
+#define VISITED_WORDS ((NUM_CITIES + 63) / 64) // Visited cities as a bitset, one bit per city
+#define IS_VISITED(v, c) (((v)[(c) >> 6] >> ((c) & 63)) & 1)
+#define SET_VISITED(v, c) ((v)[(c) >> 6] |= (uint64_t)1 << ((c) & 63))
+
+#ifndef STREAM
+#define STREAM 0            // Publish live snapshots for tools/animate.py --mode live
+#endif
+#ifndef STREAM_PATH
+#define STREAM_PATH "/tmp/aco.sock"
+#endif
+
+#ifndef SNAPSHOTS
+#define SNAPSHOTS 0         // Write keyframe + delta pheromone history for the animators
+#endif
+#ifndef SNAPSHOT_DIR
+#define SNAPSHOT_DIR "./data/snapshots"
+#endif
+#ifndef KEYFRAME_EVERY
+#define KEYFRAME_EVERY 10   // Full matrix every KEYFRAME_EVERY iterations, deltas in between
+#endif
+
+#ifndef LOCAL_SEARCH
+#define LOCAL_SEARCH 0      // LS_NONE, LS_ALL (every ant) or LS_BEST (iteration best), see local_search.h
+#endif
+
+#ifndef UPDATE_RULE
+#define UPDATE_RULE 0       // RULE_AS (every ant deposits), RULE_MMAS or RULE_RANK, see update_rule.h
+#endif
+
+#ifndef SEED
+#define SEED time(NULL)     // Fixed value for reproducible runs
+#endif
+
+#ifndef CHECKPOINT_EVERY
+#define CHECKPOINT_EVERY 0  // Save the colony state every CHECKPOINT_EVERY iterations, restart with --resume
+#endif
+#ifndef CHECKPOINT_PATH
+#define CHECKPOINT_PATH "./aco.ckpt"
+#endif
+
+#ifdef USE_FLOAT
+typedef float real_t;       // Single precision pheromones, deposits and distances
+#define PHERO_FLOOR FLT_MIN // Evaporated edges would underflow to 0 within ~45 iterations
+#define MPI_REAL_TYPE MPI_FLOAT
+#else
+typedef double real_t;
+#define PHERO_FLOOR 0.0
+#define MPI_REAL_TYPE MPI_DOUBLE
+#endif
+
+#include "stream.h"
+#include "snapshot.h"
+#include "local_search.h"
+#include "update_rule.h"
+#include "checkpoint.h"
+
+#ifndef TSP_FILE
+#define TSP_FILE "./pACO/tsplib/d15112.tsp"  //rat783
+#endif
+char* filename = TSP_FILE;
+real_t *distance;           // Unused with DIST_ON_THE_FLY
+double *x_coords;           // Coordinates as structure of arrays
+double *y_coords;
+real_t *pheromones;
+int row_offset[NUM_CITIES];  // getIndex(i, j) == row_offset[i] + j
+real_t *local_contr;
+uint64_t visited[VISITED_WORDS];
 double probabilities[NUM_CITIES];
+#ifdef DIST_ON_THE_FLY
+double dist_row[NUM_CITIES];
+#endif
 
 typedef struct {
     int tour[NUM_CITIES];
     double tourLength;
 } AntTour;
 
+AntTour *all_tours;         // Tours gathered on rank 0, Ant System only
+AntTour *elite_tours;       // This rank's and every rank's best tours, rank-based AS only
+AntTour *all_elite;
+
 void defineAntTourMPIType(MPI_Datatype *antTourType) {
     int blockLengths[2] = {NUM_CITIES, 1};
     MPI_Datatype types[2] = {MPI_INT, MPI_DOUBLE};
@@ -52,11 +127,23 @@ void skip_lines(int lines, FILE *f) {
 }
 
 int getIndex(int i, int j) {
+#ifdef CHECK_INDEX
     if (i >= j) {
         fprintf(stderr, "Invalid access: i (%d) should be less than j (%d)\n", i, j);
         exit(EXIT_FAILURE);
     }
-    return (i * (2 * NUM_CITIES - i - 1)) / 2 + (j - i - 1);
+#endif
+    return row_offset[i] + j;
+}
+
+real_t get_distance(int i, int j) {
+#ifdef DIST_ON_THE_FLY
+    double dx = x_coords[i] - x_coords[j];
+    double dy = y_coords[i] - y_coords[j];
+    return sqrt(dx * dx + dy * dy);
+#else
+    return distance[(i < j) ? getIndex(i, j) : getIndex(j, i)];
+#endif
 }
 
 void init_tsp() {
@@ -72,13 +159,20 @@ void init_tsp() {
     //skip_lines(3, file);
 
     // Allocate memory for coordinates and matrices
-    double *x_coords = (double *)malloc(NUM_CITIES * sizeof(double));
-    double *y_coords = (double *)malloc(NUM_CITIES * sizeof(double));
-    distance = (double *)malloc(MATRIX_DIM * sizeof(double));
-    pheromones = (double *)malloc(MATRIX_DIM * sizeof(double));
-    local_contr = (double *)malloc(MATRIX_DIM * sizeof(double));
+    x_coords = (double *)malloc(NUM_CITIES * sizeof(double));
+    y_coords = (double *)malloc(NUM_CITIES * sizeof(double));
+#ifndef DIST_ON_THE_FLY
+    distance = (real_t *)malloc(MATRIX_DIM * sizeof(real_t));
+    if (!distance) {
+        perror("Memory allocation failed");
+        exit(EXIT_FAILURE);
+    }
+#endif
+    pheromones = (real_t *)malloc(MATRIX_DIM * sizeof(real_t));
+    if (UPDATE_RULE == RULE_AS) // Only Ant System reduces a full contribution matrix
+        local_contr = (real_t *)malloc(MATRIX_DIM * sizeof(real_t));
 
-    if (!distance || !pheromones || !x_coords || !y_coords) {
+    if (!pheromones || !x_coords || !y_coords) {
         perror("Memory allocation failed");
         exit(EXIT_FAILURE);
     }
@@ -89,24 +183,32 @@ void init_tsp() {
         fscanf(file, "%d %lf %lf", &index, &x_coords[i], &y_coords[i]);
     }
     
+    // Start of each row of the triangular matrices, minus the skipped diagonal part
+    for (i = 0; i < NUM_CITIES; i++)
+        row_offset[i] = (int)(((long)i * (2 * NUM_CITIES - i - 1)) / 2 - i - 1);
+
     // Compute distances matrix
     for (i = 0; i < NUM_CITIES; i++) {
         for (j = i + 1; j < NUM_CITIES; j++) {
-            double dx, dy;
             idx = getIndex(i, j);
-            dx = x_coords[i] - x_coords[j];
-            dy = y_coords[i] - y_coords[j];
+#ifndef DIST_ON_THE_FLY
+            double dx = x_coords[i] - x_coords[j];
+            double dy = y_coords[i] - y_coords[j];
             distance[idx] = sqrt(dx * dx + dy * dy);
+#endif
             pheromones[idx] = 1.0;
         }
     }
 
+#ifndef DIST_ON_THE_FLY
     free(x_coords);
     free(y_coords);
+    x_coords = y_coords = NULL;
+#endif
     fclose(file);
 }
 
-int select_next_city(int current_city, int *visited) {
+int select_next_city(int current_city, const uint64_t *visited) {
     int i;
     double sum = 0.0;
     double r, cumulative;
@@ -114,11 +216,24 @@ int select_next_city(int current_city, int *visited) {
     for (i = 0; i < NUM_CITIES; i++)
         probabilities[i] = 0.0;
     
+#ifdef DIST_ON_THE_FLY
+    // Squared distances of the current city's row in one vectorizable pass over the coordinates
+    for (i = 0; i < NUM_CITIES; i++) {
+        double dx = x_coords[current_city] - x_coords[i];
+        double dy = y_coords[current_city] - y_coords[i];
+        dist_row[i] = dx * dx + dy * dy;
+    }
+#endif
+
     for (i = 0; i < NUM_CITIES; i++) {
-        if (!visited[i] && current_city != i) {
+        if (!IS_VISITED(visited, i) && current_city != i) {
             int idx = (current_city < i) ? getIndex(current_city, i) : getIndex(i, current_city);
             double tau = pow(pheromones[idx], ALPHA);
+#ifdef DIST_ON_THE_FLY
+            double eta = pow(1.0 / sqrt(dist_row[i]), BETA);
+#else
             double eta = pow(1.0 / distance[idx], BETA);
+#endif
             probabilities[i] = tau * eta;
             sum += probabilities[i];
         }
@@ -145,34 +260,42 @@ int select_next_city(int current_city, int *visited) {
 
 void construct_solution(int *tour) {
     int i, step, current_city, next_city;
-    for (i = 0; i < NUM_CITIES; i++)
+    for (i = 0; i < VISITED_WORDS; i++)
         visited[i] = 0;
     current_city = rand() % NUM_CITIES;
     tour[0] = current_city;
-    visited[current_city] = 1;
+    SET_VISITED(visited, current_city);
 
     for (step = 1; step < NUM_CITIES; step++) {
         next_city = select_next_city(current_city, visited);
         tour[step] = next_city;
-        visited[next_city] = 1;
+        SET_VISITED(visited, next_city);
         current_city = next_city;
     }
 }
 
 double evaluate_tour(int *tour) {
     double total_distance = 0.0;
-    int i, idx;
+    int i;
     
     for (i = 0; i < NUM_CITIES - 1; i++) {
-        idx = (tour[i] < tour[i + 1]) ? getIndex(tour[i], tour[i + 1]) : getIndex(tour[i + 1], tour[i]);
-        total_distance += distance[idx];
+        total_distance += get_distance(tour[i], tour[i + 1]);
     }
-    idx = (tour[NUM_CITIES - 1] < tour[0]) ? getIndex(tour[NUM_CITIES - 1], tour[0]) : getIndex(tour[0], tour[NUM_CITIES - 1]);
-    total_distance += distance[idx];
+    total_distance += get_distance(tour[NUM_CITIES - 1], tour[0]);
 
     return total_distance;
 }
 
+// Applies local search to the shortest of the given tours only
+void improve_iteration_best(AntTour *ant_tours, int num_ants) {
+    int i, best = 0;
+    for (i = 1; i < num_ants; i++)
+        if (ant_tours[i].tourLength < ant_tours[best].tourLength)
+            best = i;
+    local_search(ant_tours[best].tour);
+    ant_tours[best].tourLength = evaluate_tour(ant_tours[best].tour);
+}
+
 void local_pheromones(AntTour* ant_tours, int num_ants) {
     int i, k, idx, from, to, temp;
     double contribution;
@@ -204,11 +327,78 @@ void evaporate_pheromones(AntTour *ant_tours) {
         for (j = i + 1; j < NUM_CITIES; j++) {
             idx = getIndex(i, j);
             pheromones[idx] *= (1.0 - EVAPORATION);
+            if (pheromones[idx] < PHERO_FLOOR)
+                pheromones[idx] = PHERO_FLOOR;
         }
     }
 }
 
-int main() {
+// MMAS / rank-based update: only the winning tours are exchanged, then every rank
+// applies the same evaporation and deposits to its own copy of the pheromones
+void elite_pheromones(AntTour *ant_tours, int ants_per_proc, MPI_Datatype tourType, int comm_size, int comm_rank,
+                      int *best_tour, double *best_cost, double *iter_best, double *iter_sum) {
+    int order[RANK_W];
+    double order_len[RANK_W];
+    double local_sum = 0.0;
+    int i, count = 0, w = UPDATE_RULE == RULE_MMAS ? 1 : RANK_W - 1;
+
+    for (i = 0; i < ants_per_proc; i++) {
+        rank_insert(order, order_len, &count, w, i, ant_tours[i].tourLength);
+        local_sum += ant_tours[i].tourLength;
+    }
+    MPI_Reduce(&local_sum, iter_sum, 1, MPI_DOUBLE, MPI_SUM, 0, MPI_COMM_WORLD);
+
+    if (UPDATE_RULE == RULE_MMAS) {
+        struct { double len; int rank; } local = {order_len[0], comm_rank}, winner;
+        int iter_tour[NUM_CITIES];
+
+        // The rank holding the iteration best broadcasts just that tour
+        MPI_Allreduce(&local, &winner, 1, MPI_DOUBLE_INT, MPI_MINLOC, MPI_COMM_WORLD);
+        if (comm_rank == winner.rank)
+            memcpy(iter_tour, ant_tours[order[0]].tour, NUM_CITIES * sizeof(int));
+        MPI_Bcast(iter_tour, NUM_CITIES, MPI_INT, winner.rank, MPI_COMM_WORLD);
+
+        *iter_best = winner.len;
+        if (winner.len < *best_cost) {
+            *best_cost = winner.len;
+            memcpy(best_tour, iter_tour, NUM_CITIES * sizeof(int));
+        }
+
+        evaporate_pheromones(ant_tours);
+        if (MMAS_GLOBAL_BEST)
+            deposit_tour(pheromones, best_tour, Q / *best_cost);
+        else
+            deposit_tour(pheromones, iter_tour, Q / winner.len);
+        mmas_clamp(pheromones, *best_cost);
+    } else {
+        // Each rank contributes its w best tours, the global top w are picked from those
+        for (i = 0; i < w; i++) {
+            if (i < count)
+                memcpy(&elite_tours[i], &ant_tours[order[i]], sizeof(AntTour));
+            else
+                elite_tours[i].tourLength = DBL_MAX; // Fewer ants than w on this rank
+        }
+        MPI_Allgather(elite_tours, w, tourType, all_elite, w, tourType, MPI_COMM_WORLD);
+
+        count = 0;
+        for (i = 0; i < w * comm_size; i++)
+            if (all_elite[i].tourLength < DBL_MAX)
+                rank_insert(order, order_len, &count, w, i, all_elite[i].tourLength);
+
+        *iter_best = order_len[0];
+        if (order_len[0] < *best_cost) {
+            *best_cost = order_len[0];
+            memcpy(best_tour, all_elite[order[0]].tour, NUM_CITIES * sizeof(int));
+        }
+
+        evaporate_pheromones(ant_tours);
+        for (i = 0; i < count; i++)
+            deposit_tour(pheromones, all_elite[order[i]].tour, (RANK_W - 1 - i) * Q / order_len[i]);
+        deposit_tour(pheromones, best_tour, RANK_W * Q / *best_cost);
+    }
+}
+
+int main(int argc, char **argv) {
     int comm_size, comm_rank;
     double start_time, end_time;
     int ants_per_proc, num_ants;
@@ -216,65 +406,102 @@ int main() {
     MPI_Datatype tourType;
     int best_tour[NUM_CITIES];
     double best_cost = DBL_MAX;
-    int iter, i;
+    double iter_best = DBL_MAX, iter_sum = 0.0;
+    int iter, i, first_iter = 0;
+    unsigned int seed = SEED;
 
-    MPI_Init(NULL, NULL);
+    MPI_Init(&argc, &argv);
     MPI_Comm_size(MPI_COMM_WORLD, &comm_size);
     MPI_Comm_rank(MPI_COMM_WORLD, &comm_rank);
 
     init_tsp();
-    srand(time(NULL) + comm_rank * 1234); // Different seed for each process
+    if (LOCAL_SEARCH)
+        local_search_init();
+    MPI_Bcast(&seed, 1, MPI_UNSIGNED, 0, MPI_COMM_WORLD);
+    if (argc > 1 && strcmp(argv[1], "--resume") == 0
+            && checkpoint_read(CHECKPOINT_PATH, &first_iter, &seed, &best_cost, best_tour, pheromones)
+            && comm_rank == 0)
+        fprintf(stderr, "Resuming from iteration %d\n", first_iter);
+    srand(seed + comm_rank * 1234); // Different seed for each process
     
     // remove excess ants for equal distribution
     ants_per_proc = NUM_ANTS / (comm_size);
     num_ants = ants_per_proc * (comm_size);
     
     ant_tours = (AntTour *)malloc(ants_per_proc * sizeof(AntTour));
+    // Exchange buffers are allocated once, not per iteration
+    if (UPDATE_RULE == RULE_AS && comm_rank == 0)
+        all_tours = (AntTour *)malloc(num_ants * sizeof(AntTour));
+    if (UPDATE_RULE == RULE_RANK) {
+        elite_tours = (AntTour *)malloc((RANK_W - 1) * sizeof(AntTour));
+        all_elite = (AntTour *)malloc((RANK_W - 1) * comm_size * sizeof(AntTour));
+    }
 
     defineAntTourMPIType(&tourType);
 
     if (comm_rank == 0) {
+        if (STREAM)
+            stream_open(STREAM_PATH, NUM_CITIES);
         start_time = MPI_Wtime();
     }
 
-    for (iter = 0; iter < NUM_ITERATIONS; iter++) {   
-        for (i = 0; i < MATRIX_DIM; i++)
-            local_contr[i] = 0.0;
-
+    for (iter = first_iter; iter < NUM_ITERATIONS; iter++) {
+        if (CHECKPOINT_EVERY)
+            srand(seed + iter * 7919 + comm_rank * 1234); // RNG state is (seed, iteration) for restarts
         for (i = 0; i < ants_per_proc; i++) {
             construct_solution(ant_tours[i].tour);
+            if (LOCAL_SEARCH == LS_ALL)
+                local_search(ant_tours[i].tour);
             ant_tours[i].tourLength = evaluate_tour(ant_tours[i].tour);
         }
-        
-        local_pheromones(ant_tours, ants_per_proc);
-        AntTour *all_tours = NULL;
-        if (comm_rank == 0) {
-            all_tours = (AntTour *)malloc(num_ants * sizeof(AntTour));
-            memcpy(&all_tours[0], ant_tours, ants_per_proc * sizeof(AntTour));
-        }
-
-        MPI_Gather(ant_tours, ants_per_proc, tourType, all_tours, ants_per_proc, tourType, 0, MPI_COMM_WORLD);    
-
-        if (comm_rank == 0) {   
-            for (i = 0; i < num_ants; i++) {
-                if (all_tours[i].tourLength < best_cost) {
-                    best_cost = all_tours[i].tourLength;
-                    memcpy(best_tour, all_tours[i].tour, NUM_CITIES * sizeof(int));
+        if (LOCAL_SEARCH == LS_BEST)
+            improve_iteration_best(ant_tours, ants_per_proc);
+
+        if (UPDATE_RULE == RULE_AS) {
+            for (i = 0; i < MATRIX_DIM; i++)
+                local_contr[i] = 0.0;
+
+            local_pheromones(ant_tours, ants_per_proc);
+            MPI_Gather(ant_tours, ants_per_proc, tourType, all_tours, ants_per_proc, tourType, 0, MPI_COMM_WORLD);
+
+            if (comm_rank == 0) {
+                iter_best = DBL_MAX;
+                iter_sum = 0.0;
+                for (i = 0; i < num_ants; i++) {
+                    if (all_tours[i].tourLength < best_cost) {
+                        best_cost = all_tours[i].tourLength;
+                        memcpy(best_tour, all_tours[i].tour, NUM_CITIES * sizeof(int));
+                    }
+                    if (all_tours[i].tourLength < iter_best)
+                        iter_best = all_tours[i].tourLength;
+                    iter_sum += all_tours[i].tourLength;
                 }
+                //printf("Iteration %d: Best Cost = %f\n", iter + 1, best_cost);
+
+                evaporate_pheromones(all_tours);
             }
-            //printf("Iteration %d: Best Cost = %f\n", iter + 1, best_cost);
-            
-            evaporate_pheromones(all_tours);
-            free(all_tours);
+            MPI_Bcast(pheromones, MATRIX_DIM, MPI_REAL_TYPE, 0, MPI_COMM_WORLD);
+            // Summed in place: no second matrix-sized buffer
+            MPI_Allreduce(MPI_IN_PLACE, local_contr, MATRIX_DIM, MPI_REAL_TYPE, MPI_SUM, MPI_COMM_WORLD);
+
+            for (i = 0; i < MATRIX_DIM; i++)
+                pheromones[i] += local_contr[i];
+        } else {
+            elite_pheromones(ant_tours, ants_per_proc, tourType, comm_size, comm_rank,
+                             best_tour, &best_cost, &iter_best, &iter_sum);
         }
-        MPI_Bcast(pheromones, MATRIX_DIM, MPI_DOUBLE, 0, MPI_COMM_WORLD);
-        double* total_contribution = (double *)malloc(MATRIX_DIM * sizeof(double));
-        MPI_Allreduce(local_contr, total_contribution, MATRIX_DIM, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
-
-        for (i = 0; i < MATRIX_DIM; i++)
-            pheromones[i] += total_contribution[i];
-        
-        free(total_contribution);
+
+        if (SNAPSHOTS && comm_rank == 0)
+            snapshot_record(SNAPSHOT_DIR, iter, NUM_CITIES, pheromones, 1.0 - EVAPORATION,
+                            // Trails the update did not touch sit between the floor and the MMAS bounds
+                            UPDATE_RULE == RULE_MMAS ? fmax(PHERO_FLOOR, mmas_tau_min(best_cost)) : PHERO_FLOOR,
+                            UPDATE_RULE == RULE_MMAS ? mmas_tau_max(best_cost) : HUGE_VAL, KEYFRAME_EVERY);
+
+        if (STREAM && comm_rank == 0)
+            stream_publish(iter, NUM_CITIES, best_tour, best_cost, iter_best, iter_sum / num_ants, pheromones);
+
+        if (CHECKPOINT_EVERY && (iter + 1) % CHECKPOINT_EVERY == 0)
+            checkpoint_write(CHECKPOINT_PATH, iter + 1, seed, best_cost, best_tour, pheromones);
         MPI_Barrier(MPI_COMM_WORLD);
     }
 
@@ -292,10 +519,21 @@ int main() {
         printf("MPI,%d,%d,%d,1,%lf,%lf\n", NUM_CITIES, NUM_ANTS, comm_size, end_time - start_time, best_cost);
     }
 
+    if (STREAM && comm_rank == 0)
+        stream_close();
+    if (SNAPSHOTS && comm_rank == 0)
+        snapshot_free();
     MPI_Type_free(&tourType);
     MPI_Finalize();
     free(ant_tours);
+    free(all_tours);
+    free(elite_tours);
+    free(all_elite);
+    if (LOCAL_SEARCH)
+        local_search_free();
     free(distance);
+    free(x_coords);
+    free(y_coords);
     free(pheromones);
     free(local_contr);
     return 0;
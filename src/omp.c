@@ -5,21 +5,87 @@
 #include <float.h>
 #include <sys/time.h>
 #include <string.h>
+#include <stdint.h>
 #include <omp.h>
 
+#ifndef NUM_ANTS
 #define NUM_ANTS 1024        // [50, 800]
+#endif
+#ifndef NUM_ITERATIONS
 #define NUM_ITERATIONS 10
+#endif
 #define ALPHA 4.0           // [3.0, 5.0]
 #define BETA 3.0            // 3.0
 #define EVAPORATION 0.9     // [0.4, 1.0] - 0.8 - Dorigo et al. found 0.99 for TSP
 #define Q 100.0
+#ifndef NUM_CITIES
 #define NUM_CITIES 783      // 783
+#endif
 #define MATRIX_DIM ((NUM_CITIES * (NUM_CITIES - 1)) / 2) // Triangular matrix size
-
-char* filename = "./pACO/tsplib/rat783.tsp";
+#define VISITED_WORDS ((NUM_CITIES + 63) / 64) // Visited cities as a bitset, one bit per city
+#define IS_VISITED(v, c) (((v)[(c) >> 6] >> ((c) & 63)) & 1)
+#define SET_VISITED(v, c) ((v)[(c) >> 6] |= (uint64_t)1 << ((c) & 63))
+
+#ifndef STREAM
+#define STREAM 0            // Publish live snapshots for tools/animate.py --mode live
+#endif
+#ifndef STREAM_PATH
+#define STREAM_PATH "/tmp/aco.sock"
+#endif
+
+#ifndef SNAPSHOTS
+#define SNAPSHOTS 0         // Write keyframe + delta pheromone history for the animators
+#endif
+#ifndef SNAPSHOT_DIR
+#define SNAPSHOT_DIR "./data/snapshots"
+#endif
+#ifndef KEYFRAME_EVERY
+#define KEYFRAME_EVERY 10   // Full matrix every KEYFRAME_EVERY iterations, deltas in between
+#endif
+
+#ifndef LOCAL_SEARCH
+#define LOCAL_SEARCH 0      // LS_NONE, LS_ALL (every ant) or LS_BEST (iteration best), see local_search.h
+#endif
+
+#ifndef UPDATE_RULE
+#define UPDATE_RULE 0       // RULE_AS (every ant deposits), RULE_MMAS or RULE_RANK, see update_rule.h
+#endif
+
+#ifndef SEED
+#define SEED time(NULL)     // Fixed value for reproducible runs
+#endif
+
+#ifndef CHECKPOINT_EVERY
+#define CHECKPOINT_EVERY 0  // Save the colony state every CHECKPOINT_EVERY iterations, restart with --resume
+#endif
+#ifndef CHECKPOINT_PATH
+#define CHECKPOINT_PATH "./aco.ckpt"
+#endif
+
+#ifdef USE_FLOAT
+typedef float real_t;       // Single precision pheromones, deposits and distances
+#define PHERO_FLOOR FLT_MIN // Evaporated edges would underflow to 0 within ~45 iterations
+#else
+typedef double real_t;
+#define PHERO_FLOOR 0.0
+#endif
+
+#include "stream.h"
+#include "snapshot.h"
+#include "local_search.h"
+#include "update_rule.h"
+#include "checkpoint.h"
+
+#ifndef TSP_FILE
+#define TSP_FILE "./pACO/tsplib/rat783.tsp"
+#endif
+char* filename = TSP_FILE;
 int num_cities;
-double* distance;
-double* pheromones;
+real_t *distance;           // Unused with DIST_ON_THE_FLY
+double *x_coords;           // Coordinates as structure of arrays
+double *y_coords;
+real_t *pheromones;
+int row_offset[NUM_CITIES];  // getIndex(i, j) == row_offset[i] + j
 
 typedef struct {
     int tour[NUM_CITIES];
@@ -38,11 +104,23 @@ void skip_lines(int lines, FILE *f) {
 }
 
 int getIndex(int i, int j) {
+#ifdef CHECK_INDEX
     if (i >= j) {
         fprintf(stderr, "Invalid access: i (%d) should be less than j (%d)\n", i, j);
         exit(EXIT_FAILURE);
     }
-    return (i * (2 * NUM_CITIES - i - 1)) / 2 + (j - i - 1);
+#endif
+    return row_offset[i] + j;
+}
+
+real_t get_distance(int i, int j) {
+#ifdef DIST_ON_THE_FLY
+    double dx = x_coords[i] - x_coords[j];
+    double dy = y_coords[i] - y_coords[j];
+    return sqrt(dx * dx + dy * dy);
+#else
+    return distance[(i < j) ? getIndex(i, j) : getIndex(j, i)];
+#endif
 }
 
 void init_tsp() {
@@ -58,12 +136,18 @@ void init_tsp() {
     //skip_lines(5, file);
 
     // Allocate memory for coordinates and matrices
-    double *x_coords = (double *)malloc(NUM_CITIES * sizeof(double));
-    double *y_coords = (double *)malloc(NUM_CITIES * sizeof(double));
-    distance = (double *)malloc(MATRIX_DIM * sizeof(double));
-    pheromones = (double *)malloc(MATRIX_DIM * sizeof(double));
+    x_coords = (double *)malloc(NUM_CITIES * sizeof(double));
+    y_coords = (double *)malloc(NUM_CITIES * sizeof(double));
+#ifndef DIST_ON_THE_FLY
+    distance = (real_t *)malloc(MATRIX_DIM * sizeof(real_t));
+    if (!distance) {
+        perror("Memory allocation failed");
+        exit(EXIT_FAILURE);
+    }
+#endif
+    pheromones = (real_t *)malloc(MATRIX_DIM * sizeof(real_t));
 
-    if (!distance || !pheromones || !x_coords || !y_coords) {
+    if (!pheromones || !x_coords || !y_coords) {
         perror("Memory allocation failed");
         exit(EXIT_FAILURE);
     }
@@ -74,36 +158,60 @@ void init_tsp() {
         fscanf(file, "%d %lf %lf", &index, &x_coords[i], &y_coords[i]);
     }
     
+    // Start of each row of the triangular matrices, minus the skipped diagonal part
+    for (i = 0; i < NUM_CITIES; i++)
+        row_offset[i] = (int)(((long)i * (2 * NUM_CITIES - i - 1)) / 2 - i - 1);
+
     // Compute distances matrix
     for (i = 0; i < NUM_CITIES; i++) {
         for (j = i + 1; j < NUM_CITIES; j++) {
-            double dx, dy;
             idx = getIndex(i, j);
-            dx = x_coords[i] - x_coords[j];
-            dy = y_coords[i] - y_coords[j];
+#ifndef DIST_ON_THE_FLY
+            double dx = x_coords[i] - x_coords[j];
+            double dy = y_coords[i] - y_coords[j];
             distance[idx] = sqrt(dx * dx + dy * dy);
+#endif
             pheromones[idx] = 1.0;
         }
     }
 
+#ifndef DIST_ON_THE_FLY
     free(x_coords);
     free(y_coords);
+    x_coords = y_coords = NULL;
+#endif
     fclose(file);
 }
 
-int select_next_city(int current_city, int *visited) {
+int select_next_city(int current_city, const uint64_t *visited) {
     int i;
     double sum = 0.0, r, cumulative = 0.0;
     double probabilities[NUM_CITIES];
+#ifdef DIST_ON_THE_FLY
+    double dist_row[NUM_CITIES];
+#endif
 
     for (i = 0; i < NUM_CITIES; i++)
         probabilities[i] = 0.0;
 
+#ifdef DIST_ON_THE_FLY
+    // Squared distances of the current city's row in one vectorizable pass over the coordinates
+    for (i = 0; i < NUM_CITIES; i++) {
+        double dx = x_coords[current_city] - x_coords[i];
+        double dy = y_coords[current_city] - y_coords[i];
+        dist_row[i] = dx * dx + dy * dy;
+    }
+#endif
+
     for (i = 0; i < NUM_CITIES; i++) {
-        if (!visited[i] && current_city != i) {
+        if (!IS_VISITED(visited, i) && current_city != i) {
             int idx = (current_city < i) ? getIndex(current_city, i) : getIndex(i, current_city);
             double tau = pow(pheromones[idx], ALPHA);
+#ifdef DIST_ON_THE_FLY
+            double eta = pow(1.0 / sqrt(dist_row[i]), BETA);
+#else
             double eta = pow(1.0 / distance[idx], BETA);
+#endif
             probabilities[i] = tau * eta;
             sum += probabilities[i];
         }
@@ -128,39 +236,47 @@ int select_next_city(int current_city, int *visited) {
     return -1; 
 }
 
-void construct_solution(int *tour, int *visited) {
+void construct_solution(int *tour, uint64_t *visited) {
     int i, step, current_city, next_city;
-    for (i = 0; i < NUM_CITIES; i++)
+    for (i = 0; i < VISITED_WORDS; i++)
         visited[i] = 0;
     current_city = rand() % NUM_CITIES;
     tour[0] = current_city;
-    visited[current_city] = 1;
+    SET_VISITED(visited, current_city);
 
     for (step = 1; step < NUM_CITIES; step++) {
         next_city = select_next_city(current_city, visited);
         tour[step] = next_city;
-        visited[next_city] = 1;
+        SET_VISITED(visited, next_city);
         current_city = next_city;
     }
 }
 
 double evaluate_tour(int *tour) {
     double total_distance = 0.0;
-    int i, idx;
+    int i;
     
     #pragma omp parallel for reduction(+:total_distance)
     for (i = 0; i < NUM_CITIES - 1; i++) {
-        idx = (tour[i] < tour[i + 1]) ? getIndex(tour[i], tour[i + 1]) : getIndex(tour[i + 1], tour[i]);
-        total_distance += distance[idx];
+        total_distance += get_distance(tour[i], tour[i + 1]);
     }
-    idx = (tour[NUM_CITIES - 1] < tour[0]) ? getIndex(tour[NUM_CITIES - 1], tour[0]) : getIndex(tour[0], tour[NUM_CITIES - 1]);
-    total_distance += distance[idx];
+    total_distance += get_distance(tour[NUM_CITIES - 1], tour[0]);
 
     return total_distance;
 }
 
-void update_pheromones(AntTour* ant_tours) {
-    int i, j, k, idx, from, to, temp;
+// Applies local search to the shortest of the given tours only
+void improve_iteration_best(AntTour *ant_tours, int num_ants) {
+    int i, best = 0;
+    for (i = 1; i < num_ants; i++)
+        if (ant_tours[i].tourLength < ant_tours[best].tourLength)
+            best = i;
+    local_search(ant_tours[best].tour);
+    ant_tours[best].tourLength = evaluate_tour(ant_tours[best].tour);
+}
+
+void update_pheromones(AntTour* ant_tours, const int *best_tour, double best_cost) {
+    int i, j, k, idx, from, to, temp, best = 0;
     double contribution;
 
     #pragma omp parallel for private(i, j, idx)
@@ -168,9 +284,35 @@ void update_pheromones(AntTour* ant_tours) {
         for (j = i + 1; j < NUM_CITIES; j++) {
             idx = getIndex(i, j);
             pheromones[idx] *= (1.0 - EVAPORATION);
+            if (pheromones[idx] < PHERO_FLOOR)
+                pheromones[idx] = PHERO_FLOOR;
         }
     }
 
+    if (UPDATE_RULE == RULE_MMAS) {
+        if (MMAS_GLOBAL_BEST) {
+            deposit_tour(pheromones, best_tour, Q / best_cost);
+        } else {
+            for (k = 1; k < NUM_ANTS; k++)
+                if (ant_tours[k].tourLength < ant_tours[best].tourLength)
+                    best = k;
+            deposit_tour(pheromones, ant_tours[best].tour, Q / ant_tours[best].tourLength);
+        }
+        mmas_clamp(pheromones, best_cost);
+        return;
+    }
+    if (UPDATE_RULE == RULE_RANK) {
+        int order[RANK_W];
+        double order_len[RANK_W];
+        int count = 0;
+        for (k = 0; k < NUM_ANTS; k++)
+            rank_insert(order, order_len, &count, RANK_W - 1, k, ant_tours[k].tourLength);
+        for (k = 0; k < count; k++)
+            deposit_tour(pheromones, ant_tours[order[k]].tour, (RANK_W - 1 - k) * Q / order_len[k]);
+        deposit_tour(pheromones, best_tour, RANK_W * Q / best_cost);
+        return;
+    }
+
     #pragma omp parallel for private(i, k, idx, from, to, temp, contribution) shared(pheromones)
     for (k = 0; k < NUM_ANTS; k++) {
         contribution = Q / ant_tours[k].tourLength;
@@ -194,27 +336,41 @@ void update_pheromones(AntTour* ant_tours) {
     }
 }
 
-int main() {
+int main(int argc, char **argv) {
     struct timeval start, end;
     int best_tour[NUM_CITIES];
     double best_cost = DBL_MAX;
-    int iter, i;
+    int iter, i, first_iter = 0;
+    unsigned int seed = SEED;
     AntTour* ant_tours;
 
     init_tsp();
-    srand(time(NULL));
+    if (LOCAL_SEARCH)
+        local_search_init();
+    if (argc > 1 && strcmp(argv[1], "--resume") == 0
+            && checkpoint_read(CHECKPOINT_PATH, &first_iter, &seed, &best_cost, best_tour, pheromones))
+        fprintf(stderr, "Resuming from iteration %d\n", first_iter);
+    srand(seed);
 
     ant_tours = (AntTour *)malloc(NUM_ANTS * sizeof(AntTour));
+    if (STREAM)
+        stream_open(STREAM_PATH, NUM_CITIES);
 
     gettimeofday(&start, NULL);
 
-    for (iter = 0; iter < NUM_ITERATIONS; iter++) {
+    for (iter = first_iter; iter < NUM_ITERATIONS; iter++) {
+        if (CHECKPOINT_EVERY)
+            srand(seed + iter * 7919); // RNG state is (seed, iteration) for restarts
         #pragma omp parallel for
         for (i = 0; i < NUM_ANTS; i++) {
-            int local_visited[NUM_CITIES] = {0};
+            uint64_t local_visited[VISITED_WORDS];
             construct_solution(ant_tours[i].tour, local_visited);
+            if (LOCAL_SEARCH == LS_ALL)
+                local_search(ant_tours[i].tour);
             ant_tours[i].tourLength = evaluate_tour(ant_tours[i].tour);
         }
+        if (LOCAL_SEARCH == LS_BEST)
+            improve_iteration_best(ant_tours, NUM_ANTS);
 
         double local_best = DBL_MAX;
         int local_best_tour[NUM_CITIES];
@@ -247,7 +403,22 @@ int main() {
         }
         //printf("Iteration %d: Best Cost = %f\n", iter + 1, best_cost);
 
-        update_pheromones(ant_tours);
+        update_pheromones(ant_tours, best_tour, best_cost);
+        if (SNAPSHOTS)
+            snapshot_record(SNAPSHOT_DIR, iter, NUM_CITIES, pheromones, 1.0 - EVAPORATION,
+                            // Trails the update did not touch sit between the floor and the MMAS bounds
+                            UPDATE_RULE == RULE_MMAS ? fmax(PHERO_FLOOR, mmas_tau_min(best_cost)) : PHERO_FLOOR,
+                            UPDATE_RULE == RULE_MMAS ? mmas_tau_max(best_cost) : HUGE_VAL, KEYFRAME_EVERY);
+
+        if (STREAM) {
+            double iter_sum = 0.0;
+            for (i = 0; i < NUM_ANTS; i++)
+                iter_sum += ant_tours[i].tourLength;
+            stream_publish(iter, NUM_CITIES, best_tour, best_cost, local_best, iter_sum / NUM_ANTS, pheromones);
+        }
+
+        if (CHECKPOINT_EVERY && (iter + 1) % CHECKPOINT_EVERY == 0)
+            checkpoint_write(CHECKPOINT_PATH, iter + 1, seed, best_cost, best_tour, pheromones);
     }
 
     gettimeofday(&end, NULL);
@@ -257,8 +428,16 @@ int main() {
     //printf("Time: %.6f\n", elapsed);
     printf("OMP,%d,%d,1,%d,%.6f,%lf\n", NUM_CITIES, NUM_ANTS, omp_get_num_threads(), elapsed, best_cost);
 
+    if (STREAM)
+        stream_close();
+    if (SNAPSHOTS)
+        snapshot_free();
     free(ant_tours);
+    if (LOCAL_SEARCH)
+        local_search_free();
     free(distance);
+    free(x_coords);
+    free(y_coords);
     free(pheromones);
     return 0;
 }
\ No newline at end of file
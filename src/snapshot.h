@@ -0,0 +1,137 @@
+/*
+ * Compact pheromone history for the animators (animators/history.py).
+ *
+ * Instead of dumping the whole matrix every iteration, a keyframe with the full
+ * triangular matrix is written every `keyframe_every` iterations. In between,
+ * only the uniform evaporation factor, the bounds trails are clamped to, and the
+ * sparse list of edges whose value is not just the evaporated and clamped
+ * previous one (i.e. the deposits) are written:
+ *
+ *   <dir>/<iteration>.key    int32 magic, num_cities, iteration, sizeof(real_t)
+ *                            real_t pheromones[MATRIX_DIM]
+ *   <dir>/<iteration>.delta  int32 magic, num_cities, iteration, sizeof(real_t)
+ *                            double factor, lower, upper, int64 count,
+ *                            {int64 index, double value}[count]
+ *
+ * A delta is replayed as `tau = clamp((real_t)(tau * factor), lower, upper);
+ * tau[index] = value`, which reproduces the engine's matrix bit for bit. When
+ * the deposits would take as much space as the matrix, a keyframe is written
+ * instead. Call snapshot_record on a single process after the pheromone update
+ * of every iteration. The including engine must define real_t, the pheromone
+ * element type.
+ */
+#ifndef SNAPSHOT_H
+#define SNAPSHOT_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <errno.h>
+#include <sys/stat.h>
+
+#define SNAPSHOT_KEY_MAGIC 0x59454b41   // "AKEY"
+#define SNAPSHOT_DELTA_MAGIC 0x544c4441 // "ADLT"
+
+static real_t *snapshot_prev = NULL;
+
+// mkdir -p
+static void snapshot_mkdirs(const char *dir) {
+    char path[256];
+    char *p;
+    strncpy(path, dir, sizeof(path) - 1);
+    path[sizeof(path) - 1] = '\0';
+    for (p = path + 1; *p; p++) {
+        if (*p == '/') {
+            *p = '\0';
+            mkdir(path, 0755);
+            *p = '/';
+        }
+    }
+    if (mkdir(path, 0755) != 0 && errno != EEXIST) {
+        perror("Error creating snapshot directory");
+        exit(EXIT_FAILURE);
+    }
+}
+
+static FILE *snapshot_open(const char *dir, int iteration, const char *ext, int32_t magic, int num_cities) {
+    char path[300];
+    int32_t header[4] = {magic, num_cities, iteration, (int32_t)sizeof(real_t)};
+    FILE *file;
+
+    snprintf(path, sizeof(path), "%s/%d.%s", dir, iteration, ext);
+    file = fopen(path, "wb");
+    if (!file) {
+        perror("Error opening snapshot file");
+        exit(EXIT_FAILURE);
+    }
+    fwrite(header, sizeof(int32_t), 4, file);
+    return file;
+}
+
+// Value of an edge nothing deposited on: evaporated, then clamped like the engine does
+static real_t snapshot_evaporate(real_t prev, double factor, double lower, double upper) {
+    real_t tau = (real_t)(prev * factor);
+    if (tau > upper)
+        tau = upper;
+    else if (tau < lower)
+        tau = lower;
+    return tau;
+}
+
+void snapshot_record(const char *dir, int iteration, int num_cities, const real_t *pheromones,
+                     double factor, double lower, double upper, int keyframe_every) {
+    long i, matrix_dim = ((long)num_cities * (num_cities - 1)) / 2;
+    int64_t count = 0;
+    int keyframe = iteration % keyframe_every == 0;
+    FILE *file;
+
+    if (!snapshot_prev) {
+        snapshot_mkdirs(dir);
+        snapshot_prev = (real_t *)malloc(matrix_dim * sizeof(real_t));
+        if (!snapshot_prev) {
+            perror("Memory allocation failed");
+            exit(EXIT_FAILURE);
+        }
+        keyframe = 1; // Deltas need a previous matrix to apply to
+    }
+
+    if (!keyframe) {
+        for (i = 0; i < matrix_dim; i++)
+            if (pheromones[i] != snapshot_evaporate(snapshot_prev[i], factor, lower, upper))
+                count++;
+        // Dense updates: 16 bytes per entry would outgrow the full matrix
+        keyframe = count * (int64_t)(sizeof(int64_t) + sizeof(double)) >= matrix_dim * (int64_t)sizeof(real_t);
+    }
+
+    if (keyframe) {
+        file = snapshot_open(dir, iteration, "key", SNAPSHOT_KEY_MAGIC, num_cities);
+        fwrite(pheromones, sizeof(real_t), matrix_dim, file);
+    } else {
+        file = snapshot_open(dir, iteration, "delta", SNAPSHOT_DELTA_MAGIC, num_cities);
+        fwrite(&factor, sizeof(double), 1, file);
+        fwrite(&lower, sizeof(double), 1, file);
+        fwrite(&upper, sizeof(double), 1, file);
+        fwrite(&count, sizeof(int64_t), 1, file);
+
+        for (i = 0; i < matrix_dim; i++) {
+            // Same rounding as the engines' `pheromones[idx] *= (1.0 - EVAPORATION)`
+            if (pheromones[i] != snapshot_evaporate(snapshot_prev[i], factor, lower, upper)) {
+                int64_t idx = i;
+                double value = pheromones[i];
+                fwrite(&idx, sizeof(int64_t), 1, file);
+                fwrite(&value, sizeof(double), 1, file);
+            }
+        }
+    }
+
+    fclose(file);
+    memcpy(snapshot_prev, pheromones, matrix_dim * sizeof(real_t));
+}
+
+void snapshot_free() {
+    free(snapshot_prev);
+    snapshot_prev = NULL;
+}
+
+#endif
@@ -0,0 +1,196 @@
+/*
+ * Live snapshots for `tools/animate.py --mode live`.
+ *
+ * Every call to stream_publish sends one datagram to the Unix socket bound by
+ * the viewer. Sends are non-blocking and failures (no viewer, full buffer) are
+ * ignored, so a slow or absent viewer never stalls the solver: frames it cannot
+ * keep up with are simply dropped. A datagram must fit the socket's send buffer:
+ * stream_open raises it for the instance size (the kernel caps the request at
+ * net.core.wmem_max) and sends fewer edges if it still falls short. A datagram
+ * that is rejected as too large anyway is reported once.
+ *
+ * Datagram layout (native endianness):
+ *   uint32 magic, int32 iteration, int32 num_cities, int32 num_edges,
+ *   double best_cost, double iter_best, double iter_mean,
+ *   int32 best_tour[num_cities],
+ *   int32 from[num_edges], int32 to[num_edges], double tau[num_edges]
+ *
+ * The including engine must define real_t, the pheromone element type.
+ */
+#ifndef STREAM_H
+#define STREAM_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <unistd.h>
+#include <errno.h>
+#include <sys/socket.h>
+#include <sys/un.h>
+
+#define STREAM_MAGIC 0x4e534341u // "ACSN"
+#define STREAM_MAX_EDGES 4096    // Strongest pheromone edges sent per snapshot
+
+static int stream_fd = -1;
+static struct sockaddr_un stream_addr;
+static char *stream_buf = NULL;
+static int stream_num_edges = 0;    // Edges per datagram, so that it fits the send buffer
+static int stream_warned = 0;
+
+static size_t stream_datagram_len(int num_cities, int num_edges) {
+    return 4 * sizeof(int32_t) + 3 * sizeof(double) + num_cities * sizeof(int32_t)
+         + num_edges * (2 * sizeof(int32_t) + sizeof(double));
+}
+
+// Sets stream_num_edges to as many edges (up to STREAM_MAX_EDGES) as the send buffer allows
+static void stream_fit(int num_cities) {
+    long matrix_dim = ((long)num_cities * (num_cities - 1)) / 2;
+    long max_len, edges = matrix_dim < STREAM_MAX_EDGES ? matrix_dim : STREAM_MAX_EDGES;
+    int sndbuf;
+    socklen_t optlen = sizeof(sndbuf);
+
+    if (getsockopt(stream_fd, SOL_SOCKET, SO_SNDBUF, &sndbuf, &optlen) != 0)
+        return;
+    max_len = (long)sndbuf - 32; // Linux takes AF_UNIX datagrams up to sk_sndbuf - 32 bytes
+    if ((long)stream_datagram_len(num_cities, (int)edges) > max_len)
+        edges = (max_len - (long)stream_datagram_len(num_cities, 0))
+              / (long)(2 * sizeof(int32_t) + sizeof(double));
+    if (edges < 0) {
+        fprintf(stderr, "Stream disabled: the best tour of %d cities exceeds the %d-byte socket buffer, "
+                "raise net.core.wmem_max to view it\n", num_cities, sndbuf);
+        close(stream_fd);
+        stream_fd = -1;
+        return;
+    }
+    stream_num_edges = (int)edges;
+}
+
+void stream_open(const char *path, int num_cities) {
+    int sndbuf;
+
+    stream_fd = socket(AF_UNIX, SOCK_DGRAM, 0);
+    if (stream_fd < 0) {
+        perror("Error opening stream socket");
+        return;
+    }
+    memset(&stream_addr, 0, sizeof(stream_addr));
+    stream_addr.sun_family = AF_UNIX;
+    strncpy(stream_addr.sun_path, path, sizeof(stream_addr.sun_path) - 1);
+
+    // The default buffer (~208 KiB) holds a full datagram up to ~36k cities
+    sndbuf = (int)stream_datagram_len(num_cities, STREAM_MAX_EDGES) + 32;
+    setsockopt(stream_fd, SOL_SOCKET, SO_SNDBUF, &sndbuf, sizeof(sndbuf));
+    stream_fit(num_cities);
+}
+
+void stream_close() {
+    if (stream_fd >= 0)
+        close(stream_fd);
+    free(stream_buf);
+    stream_fd = -1;
+    stream_buf = NULL;
+}
+
+// Sift-down for the min-heap of the strongest edges seen so far
+static void stream_heap_down(double *tau, long *key, int size, int pos) {
+    int child;
+    double t;
+    long k;
+    while ((child = 2 * pos + 1) < size) {
+        if (child + 1 < size && tau[child + 1] < tau[child])
+            child++;
+        if (tau[pos] <= tau[child])
+            break;
+        t = tau[pos]; tau[pos] = tau[child]; tau[child] = t;
+        k = key[pos]; key[pos] = key[child]; key[child] = k;
+        pos = child;
+    }
+}
+
+static void stream_heap_up(double *tau, long *key, int pos) {
+    int parent;
+    double t;
+    long k;
+    while (pos > 0 && tau[parent = (pos - 1) / 2] > tau[pos]) {
+        t = tau[pos]; tau[pos] = tau[parent]; tau[parent] = t;
+        k = key[pos]; key[pos] = key[parent]; key[parent] = k;
+        pos = parent;
+    }
+}
+
+/*
+ * Publishes the best tour, the strongest pheromone edges of the triangular
+ * matrix and the iteration statistics. Does nothing when no viewer is bound.
+ */
+void stream_publish(int iteration, int num_cities, const int *best_tour, double best_cost,
+                    double iter_best, double iter_mean, const real_t *pheromones) {
+    int i, j, n = num_cities, num_edges, size = 0;
+    long idx = 0, matrix_dim = ((long)n * (n - 1)) / 2;
+    size_t len;
+    char *p;
+    int32_t header[4], *from, *to;
+    double stats[3], *heap_tau;
+    long *heap_key;
+
+    if (stream_fd < 0 || access(stream_addr.sun_path, F_OK) != 0)
+        return;
+
+    num_edges = matrix_dim < stream_num_edges ? (int)matrix_dim : stream_num_edges;
+    len = stream_datagram_len(n, num_edges);
+    if (!stream_buf)
+        stream_buf = (char *)malloc(len + num_edges * (sizeof(double) + sizeof(long)) + 8);
+    if (!stream_buf)
+        return;
+
+    // Scratch heap lives after the datagram in the same buffer
+    heap_tau = (double *)(stream_buf + len + (8 - len % 8) % 8);
+    heap_key = (long *)(heap_tau + num_edges);
+
+    // Top-k selection over the triangular layout, idx follows getIndex(i, j)
+    for (i = 0; i < n; i++) {
+        for (j = i + 1; j < n; j++, idx++) {
+            if (num_edges == 0) {
+                break;
+            } else if (size < num_edges) {
+                heap_tau[size] = pheromones[idx];
+                heap_key[size] = (long)i * n + j;
+                stream_heap_up(heap_tau, heap_key, size++);
+            } else if (pheromones[idx] > heap_tau[0]) {
+                heap_tau[0] = pheromones[idx];
+                heap_key[0] = (long)i * n + j;
+                stream_heap_down(heap_tau, heap_key, size, 0);
+            }
+        }
+    }
+
+    header[0] = (int32_t)STREAM_MAGIC;
+    header[1] = iteration;
+    header[2] = n;
+    header[3] = num_edges;
+    stats[0] = best_cost;
+    stats[1] = iter_best;
+    stats[2] = iter_mean;
+
+    p = stream_buf;
+    memcpy(p, header, sizeof(header)); p += sizeof(header);
+    memcpy(p, stats, sizeof(stats)); p += sizeof(stats);
+    memcpy(p, best_tour, n * sizeof(int32_t)); p += n * sizeof(int32_t);
+    from = (int32_t *)p; p += num_edges * sizeof(int32_t);
+    to = (int32_t *)p; p += num_edges * sizeof(int32_t);
+    for (i = 0; i < num_edges; i++) {
+        from[i] = (int32_t)(heap_key[i] / n);
+        to[i] = (int32_t)(heap_key[i] % n);
+    }
+    memcpy(p, heap_tau, num_edges * sizeof(double));
+
+    // Non-blocking: a missing, slow or full viewer just loses this frame,
+    // but an oversized datagram would be lost every iteration
+    if (sendto(stream_fd, stream_buf, len, MSG_DONTWAIT, (struct sockaddr *)&stream_addr,
+               sizeof(stream_addr)) < 0 && errno == EMSGSIZE && !stream_warned) {
+        perror("Stream snapshot dropped");
+        stream_warned = 1;
+    }
+}
+
+#endif
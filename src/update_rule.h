@@ -0,0 +1,87 @@
+/*
+ * Elitist pheromone update rules.
+ *
+ *   RULE_AS    Ant System: every ant deposits Q / L on its tour (the original engines)
+ *   RULE_MMAS  MAX-MIN Ant System: only the iteration best (or, with MMAS_GLOBAL_BEST,
+ *              the best so far) deposits, and trails are clamped to [tau_min, tau_max]
+ *   RULE_RANK  Rank-based Ant System: the RANK_W - 1 best ants of the iteration deposit
+ *              (RANK_W - r) * Q / L_r, the best so far deposits RANK_W * Q / L_best
+ *
+ * With MMAS and RANK only a handful of tours deposit, so the distributed engines
+ * exchange those tours (O(cities) ints each) and let every rank apply the same
+ * update, instead of reducing a full contribution matrix.
+ *
+ * The including engine must define NUM_CITIES, MATRIX_DIM, Q, EVAPORATION,
+ * real_t and getIndex(i, j).
+ */
+#ifndef UPDATE_RULE_H
+#define UPDATE_RULE_H
+
+#define RULE_AS 0           // Values of UPDATE_RULE
+#define RULE_MMAS 1
+#define RULE_RANK 2
+
+#ifndef MMAS_GLOBAL_BEST
+#define MMAS_GLOBAL_BEST 0  // 0: iteration best deposits, 1: best so far deposits
+#endif
+#ifndef RANK_W
+#define RANK_W 6            // Rank-based AS: RANK_W - 1 ranked ants plus the best so far (>= 2)
+#endif
+
+int getIndex(int i, int j);
+
+// Adds `amount` to every edge of a tour
+void deposit_tour(real_t *pheromones, const int *tour, double amount) {
+    int i, from, to;
+    for (i = 0; i < NUM_CITIES; i++) {
+        from = tour[i];
+        to = tour[(i + 1) % NUM_CITIES];
+        if (from < to)
+            pheromones[getIndex(from, to)] += amount;
+        else if (from > to)
+            pheromones[getIndex(to, from)] += amount;
+    }
+}
+
+// MMAS trail bounds derived from the best tour so far
+double mmas_tau_max(double best_cost) {
+    return Q / (EVAPORATION * best_cost);
+}
+
+double mmas_tau_min(double best_cost) {
+    return mmas_tau_max(best_cost) / (2.0 * NUM_CITIES);
+}
+
+// Clamps trails to [mmas_tau_min, mmas_tau_max]
+void mmas_clamp(real_t *pheromones, double best_cost) {
+    long i;
+    double tau_max = mmas_tau_max(best_cost);
+    double tau_min = mmas_tau_min(best_cost);
+
+#ifdef _OPENMP
+    #pragma omp parallel for
+#endif
+    for (i = 0; i < MATRIX_DIM; i++) {
+        if (pheromones[i] > tau_max)
+            pheromones[i] = tau_max;
+        else if (pheromones[i] < tau_min)
+            pheromones[i] = tau_min;
+    }
+}
+
+// Inserts candidate idx into the sorted list of the w shortest tours seen so far
+void rank_insert(int *order, double *order_len, int *count, int w, int idx, double len) {
+    int k;
+    if (*count == w && len >= order_len[w - 1])
+        return;
+    k = *count < w ? (*count)++ : w - 1;
+    while (k > 0 && order_len[k - 1] > len) {
+        order[k] = order[k - 1];
+        order_len[k] = order_len[k - 1];
+        k--;
+    }
+    order[k] = idx;
+    order_len[k] = len;
+}
+
+#endif
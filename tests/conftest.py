@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import subprocess
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+TESTS_DIR = os.path.join(ROOT, 'tests')
+INSTANCES_DIR = os.path.join(TESTS_DIR, 'instances')
+GOLDEN_PATH = os.path.join(TESTS_DIR, 'golden.json')
+BASELINE_PATH = os.path.join(TESTS_DIR, 'baseline.json')
+
+COMPILERS = {
+    'serial': ['gcc'],
+    'omp': ['gcc', '-fopenmp'],
+    'mpi': ['mpicc'],
+    'hybrid': ['mpicc', '-fopenmp'],
+}
+
+def pytest_addoption(parser):
+    parser.addoption('--update-golden', action='store_true',
+                     help='Rewrite tests/golden.json with the current tour lengths')
+    parser.addoption('--update-baseline', action='store_true',
+                     help='Rewrite tests/baseline.json with the current kernel throughput')
+    parser.addoption('--perf', action='store_true',
+                     help='Also run the kernel throughput checks (marker perf), off by default')
+    parser.addoption('--perf-threshold', type=float, default=0.7,
+                     help='Fail when a kernel runs below this fraction of its baseline throughput (default: 0.7)')
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'perf: kernel throughput checks against tests/baseline.json')
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Timings depend on the machine and its load, so the perf checks only run
+    when asked for with --perf, --update-baseline or a -m expression naming perf
+    """
+    if (config.getoption('--perf') or config.getoption('--update-baseline')
+            or 'perf' in (config.getoption('markexpr') or '')):
+        return
+    deselected = [item for item in items if 'perf' in item.keywords]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if 'perf' not in item.keywords]
+
+def instance(name: str) -> str:
+    return os.path.join(INSTANCES_DIR, name)
+
+def mpirun_command(ranks: int):
+    """
+    mpirun for one machine: Open MPI needs extra flags to run as root or
+    with more ranks than cores, MPICH takes neither. $MPIRUN overrides.
+    """
+    if os.environ.get('MPIRUN'):
+        return os.environ['MPIRUN'].split() + ['-n', str(ranks)]
+    command = ['mpirun', '-n', str(ranks)]
+    version = subprocess.run(['mpirun', '--version'], capture_output=True, text=True).stdout
+    if 'Open MPI' in version or 'OpenRTE' in version:
+        command += ['--oversubscribe'] + (['--allow-run-as-root'] if os.geteuid() == 0 else [])
+    return command
+
+class JsonStore:
+    def __init__(self, path: str, update: bool):
+        """
+        Reference values kept in a JSON file, rewritten at the end of the
+        session when `update` is set
+        """
+        self.path = path
+        self.update = update
+        self.values = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.values = json.load(f)
+
+    def get(self, key: str):
+        return self.values.get(key)
+
+    def set(self, key: str, value):
+        self.values[key] = value
+
+    def save(self):
+        if self.update:
+            with open(self.path, 'w') as f:
+                json.dump(self.values, f, indent=2, sort_keys=True)
+                f.write('\n')
+
+@pytest.fixture(scope='session')
+def golden(request):
+    store = JsonStore(GOLDEN_PATH, request.config.getoption('--update-golden'))
+    yield store
+    store.save()
+
+@pytest.fixture(scope='session')
+def baseline(request):
+    store = JsonStore(BASELINE_PATH, request.config.getoption('--update-baseline'))
+    yield store
+    store.save()
+
+@pytest.fixture(scope='session')
+def build(tmp_path_factory):
+    """
+    Compiles an engine (or another C file) with -D overrides, once per
+    distinct configuration in the session
+    :return: callable(engine, source=None, **defines) -> path of the binary
+    """
+    out_dir = tmp_path_factory.mktemp('bin')
+    built = {}
+
+    def _build(engine: str, source: str = None, **defines) -> str:
+        key = (engine, source, tuple(sorted(defines.items())))
+        if key in built:
+            return built[key]
+        compiler = COMPILERS[engine]
+        if not shutil.which(compiler[0]):
+            pytest.skip(f"{compiler[0]} not available")
+
+        binary = str(out_dir / f"{engine}_{len(built)}")
+        flags = [f"-D{name}={value}" for name, value in defines.items()]
+        command = compiler + ['-O2', '-I', SRC_DIR] + flags + ['-o', binary,
+                                                               source or os.path.join(SRC_DIR, f'{engine}.c'), '-lm']
+        result = subprocess.run(command, capture_output=True, text=True)
+        assert result.returncode == 0, f"{' '.join(command)}\n{result.stderr}"
+        built[key] = binary
+        return binary
+
+    return _build
+
+@pytest.fixture(scope='session')
+def run():
+    """
+    Runs an engine binary, under mpirun for the MPI engines
+    :return: callable(engine, binary, ranks=1, threads=1, args=()) -> stdout
+    """
+    def _run(engine: str, binary: str, ranks: int = 1, threads: int = 1, args=(), cwd=None) -> str:
+        command = [binary, *args]
+        if engine in ('mpi', 'hybrid'):
+            if not shutil.which('mpirun') and not os.environ.get('MPIRUN'):
+                pytest.skip("mpirun not available")
+            command = mpirun_command(ranks) + command
+        env = dict(os.environ, OMP_NUM_THREADS=str(threads))
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=cwd, timeout=600)
+        assert result.returncode == 0, f"{' '.join(command)}\n{result.stdout}\n{result.stderr}"
+        return result.stdout
+
+    return _run
@@ -0,0 +1,95 @@
+/*
+ * Micro-benchmark of the hot kernels of src/mpi.c, which is included with its
+ * main renamed away. Rank 0 prints one JSON object with the throughput of each
+ * kernel, the slowest rank's. Each is the best of many samples of a millisecond
+ * or two (one ant's tour, or BLOCK_LOOPS passes of the other kernels), spread
+ * over the whole run so a burst of load on the machine only spoils a few of
+ * them. Inputs are reset between samples so evaporated trails never reach the
+ * denormal range:
+ *
+ *   selection    select_next_city calls per second, via construct_solution
+ *   deposit      tour edges deposited per second, via local_pheromones
+ *   evaporation  matrix entries evaporated per second, via evaporate_pheromones
+ *   reduction    matrix entries summed per second, via the in-place MPI_Allreduce
+ *
+ * Build like mpi.c with -I src and the same -D overrides (see tests/test_kernels.py).
+ */
+#define main engine_main
+#include "mpi.c"
+#undef main
+
+#ifndef REPEATS
+#define REPEATS 7
+#endif
+#ifndef BLOCKS
+#define BLOCKS 20
+#endif
+#ifndef BLOCK_LOOPS
+#define BLOCK_LOOPS 100     // 0.1^100 stays well above the denormal range
+#endif
+#ifndef DEPOSIT_LOOPS
+#define DEPOSIT_LOOPS 10    // Passes of every ant's deposit per sample
+#endif
+
+int main(int argc, char **argv) {
+    int comm_rank, r, b, i, k;
+    double t, rates[4] = {0.0, 0.0, 0.0, 0.0}, slowest[4];
+    AntTour *ant_tours = (AntTour *)malloc(NUM_ANTS * sizeof(AntTour));
+
+    MPI_Init(&argc, &argv);
+    MPI_Comm_rank(MPI_COMM_WORLD, &comm_rank);
+    init_tsp();
+    srand(SEED + comm_rank * 1234);
+
+    for (r = 0; r < REPEATS; r++) {
+        // Tours are built on fresh trails, not on the ones the evaporation below drained
+        for (i = 0; i < MATRIX_DIM; i++)
+            pheromones[i] = 1.0;
+        // Ranks start every timed region together, so they share the cores alike
+        MPI_Barrier(MPI_COMM_WORLD);
+        for (i = 0; i < NUM_ANTS; i++) {
+            t = MPI_Wtime();
+            construct_solution(ant_tours[i].tour);
+            rates[0] = fmax(rates[0], (NUM_CITIES - 1) / (MPI_Wtime() - t));
+            ant_tours[i].tourLength = evaluate_tour(ant_tours[i].tour);
+        }
+
+        for (b = 0; b < BLOCKS; b++) {
+            memset(local_contr, 0, MATRIX_DIM * sizeof(real_t));
+            MPI_Barrier(MPI_COMM_WORLD);
+            t = MPI_Wtime();
+            for (k = 0; k < DEPOSIT_LOOPS; k++)
+                local_pheromones(ant_tours, NUM_ANTS);
+            rates[1] = fmax(rates[1], (double)DEPOSIT_LOOPS * NUM_ANTS * NUM_CITIES / (MPI_Wtime() - t));
+
+            for (i = 0; i < MATRIX_DIM; i++)
+                pheromones[i] = 1.0;
+            MPI_Barrier(MPI_COMM_WORLD);
+            t = MPI_Wtime();
+            for (k = 0; k < BLOCK_LOOPS; k++)
+                evaporate_pheromones(ant_tours);
+            rates[2] = fmax(rates[2], (double)BLOCK_LOOPS * MATRIX_DIM / (MPI_Wtime() - t));
+
+            memset(local_contr, 0, MATRIX_DIM * sizeof(real_t));
+            MPI_Barrier(MPI_COMM_WORLD);
+            t = MPI_Wtime();
+            for (k = 0; k < BLOCK_LOOPS; k++)
+                MPI_Allreduce(MPI_IN_PLACE, local_contr, MATRIX_DIM, MPI_REAL_TYPE, MPI_SUM, MPI_COMM_WORLD);
+            rates[3] = fmax(rates[3], (double)BLOCK_LOOPS * MATRIX_DIM / (MPI_Wtime() - t));
+        }
+    }
+
+    MPI_Reduce(rates, slowest, 4, MPI_DOUBLE, MPI_MIN, 0, MPI_COMM_WORLD);
+    if (comm_rank == 0)
+        printf("{\"selection\": %.6g, \"deposit\": %.6g, \"evaporation\": %.6g, \"reduction\": %.6g}\n",
+               slowest[0], slowest[1], slowest[2], slowest[3]);
+
+    MPI_Finalize();
+    free(ant_tours);
+    free(distance);
+    free(x_coords);
+    free(y_coords);
+    free(pheromones);
+    free(local_contr);
+    return 0;
+}
@@ -0,0 +1,137 @@
+import gc
+import math
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+from conftest import ROOT, SRC_DIR, instance
+
+sys.path.insert(0, ROOT)
+
+INSTANCES = {
+    # name: (cities, optimal tour length)
+    'circle16': (16, 3200 * math.sin(math.pi / 16)),
+    'grid36': (36, 360.0),
+}
+ANTS = 32
+ITERATIONS = 30
+SEED = 1
+GOLDEN_REL_TOL = 1e-6   # Room for libm differences in pow/sqrt, not for behaviour changes
+QUALITY = 1.10          # Every engine must end within 10% of the optimum on these instances
+
+def parse_length(stdout: str) -> float:
+    # METHOD,cities,ants,procs,threads,time,len
+    return float(stdout.strip().splitlines()[-1].split(',')[-1])
+
+def check(golden, key: str, length: float, optimum: float, quality: float = QUALITY):
+    assert length >= optimum * (1 - 1e-6), f"{key}: {length} is shorter than the optimum {optimum}"
+    assert length <= optimum * quality, f"{key}: {length} is over {quality:.0%} of the optimum {optimum}"
+    if golden.update:
+        golden.set(key, length)
+        return
+    expected = golden.get(key)
+    if expected is None:
+        pytest.skip(f"No golden value for {key}, record one with --update-golden")
+    assert length == pytest.approx(expected, rel=GOLDEN_REL_TOL), f"{key}: result changed"
+
+def engine_defines(name: str, **defines) -> dict:
+    cities, _ = INSTANCES[name]
+    return {'NUM_CITIES': cities, 'NUM_ANTS': ANTS, 'NUM_ITERATIONS': ITERATIONS, 'SEED': SEED,
+            'TSP_FILE': f'"{instance(name + ".tsp")}"', **defines}
+
+# rand() is shared by the OpenMP threads, so only one thread is reproducible
+@pytest.mark.parametrize('engine, ranks, threads', [
+    ('serial', 1, 1), ('omp', 1, 1), ('mpi', 2, 1), ('hybrid', 2, 1),
+])
+@pytest.mark.parametrize('name', INSTANCES)
+def test_engine(build, run, golden, engine, ranks, threads, name):
+    binary = build(engine, **engine_defines(name))
+    length = parse_length(run(engine, binary, ranks=ranks, threads=threads))
+    check(golden, f'{engine}/{ranks}x{threads}/{name}', length, INSTANCES[name][1])
+
+@pytest.mark.parametrize('variant, quality', [
+    # MMAS stagnates with the default ALPHA and EVAPORATION (see Update Rules in the README)
+    (dict(UPDATE_RULE=1), 1.5),
+    (dict(UPDATE_RULE=2), QUALITY),
+    (dict(LOCAL_SEARCH=1), QUALITY),
+    (dict(LOCAL_SEARCH=2), QUALITY),
+    (dict(USE_FLOAT=1), QUALITY),
+])
+@pytest.mark.parametrize('engine, ranks', [('serial', 1), ('mpi', 2)])
+def test_variant(build, run, golden, engine, ranks, variant, quality):
+    name = 'grid36'
+    binary = build(engine, **engine_defines(name, **variant))
+    length = parse_length(run(engine, binary, ranks=ranks))
+    options = ','.join(f'{k}={v}' for k, v in variant.items())
+    check(golden, f'{engine}/{ranks}x1/{name}/{options}', length, INSTANCES[name][1], quality)
+
+@pytest.mark.parametrize('engine', ['serial', 'mpi'])
+def test_distances_on_the_fly(build, run, engine):
+    # Same tours as the stored distance matrix, to the last bit
+    name = 'grid36'
+    stored = run(engine, build(engine, **engine_defines(name)), ranks=2)
+    on_the_fly = run(engine, build(engine, **engine_defines(name, DIST_ON_THE_FLY=1)), ranks=2)
+    assert parse_length(on_the_fly) == parse_length(stored)
+
+@pytest.mark.parametrize('engine, ranks', [('serial', 1), ('mpi', 2)])
+def test_resume(build, run, tmp_path, engine, ranks):
+    # Stopped after 10 iterations and resumed, a run ends as if never interrupted
+    name = 'grid36'
+    full = build(engine, **engine_defines(name, CHECKPOINT_EVERY=5, NUM_ITERATIONS=20))
+    first_half = build(engine, **engine_defines(name, CHECKPOINT_EVERY=5, NUM_ITERATIONS=10))
+    (tmp_path / 'full').mkdir()
+    (tmp_path / 'resumed').mkdir()
+    expected = parse_length(run(engine, full, ranks=ranks, cwd=tmp_path / 'full'))
+
+    run(engine, first_half, ranks=ranks, cwd=tmp_path / 'resumed')
+    assert (tmp_path / 'resumed' / 'aco.ckpt').exists()
+    resumed = parse_length(run(engine, full, ranks=ranks, args=['--resume'], cwd=tmp_path / 'resumed'))
+    assert resumed == expected
+
+@pytest.fixture(scope='module')
+def libaco(tmp_path_factory):
+    if not shutil.which('gcc'):
+        pytest.skip("gcc not available")
+    library = str(tmp_path_factory.mktemp('lib') / 'libaco.so')
+    command = ['gcc', '-O2', '-fopenmp', '-shared', '-fPIC', '-o', library, os.path.join(SRC_DIR, 'libaco.c'), '-lm']
+    result = subprocess.run(command, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return library
+
+@pytest.mark.parametrize('name', INSTANCES)
+def test_python_engine(libaco, golden, name):
+    engine = pytest.importorskip('animators.engine')
+    with engine.Colony.from_tsp(instance(name + '.tsp'), num_ants=ANTS, seed=SEED, lib_path=libaco) as colony:
+        length = colony.run(ITERATIONS)
+        tour = sorted(colony.best_tour)
+    assert tour == list(range(INSTANCES[name][0]))
+    check(golden, f'libaco/{name}', length, INSTANCES[name][1])
+
+def test_python_engine_views_outlive_colony(libaco):
+    engine = pytest.importorskip('animators.engine')
+    pheromones = engine.Colony.from_tsp(instance('grid36.tsp'), num_ants=ANTS, lib_path=libaco).pheromones
+    gc.collect()
+    assert (pheromones == 1.0).all()
+
+    colony = engine.Colony.from_tsp(instance('grid36.tsp'), num_ants=ANTS, lib_path=libaco)
+    tour = colony.best_tour
+    colony.close()
+    assert sorted(tour) == list(range(36))
+    with pytest.raises(ValueError):
+        colony.run(1)
+
+def test_python_engine_restore(libaco):
+    # A state saved mid-run and restored into another colony continues the same run
+    engine = pytest.importorskip('animators.engine')
+    path = instance('grid36.tsp')
+    with engine.Colony.from_tsp(path, num_ants=ANTS, seed=SEED, lib_path=libaco) as colony:
+        colony.run(ITERATIONS // 2)
+        state = colony.get_state()
+        expected = colony.run(ITERATIONS // 2)
+        expected_pheromones = colony.pheromones.copy()
+    with engine.Colony.from_tsp(path, num_ants=ANTS, seed=SEED + 1, lib_path=libaco) as colony:
+        colony.set_state(**state)
+        assert colony.run(ITERATIONS // 2) == expected
+        assert colony.iteration == ITERATIONS
+        assert (colony.pheromones == expected_pheromones).all()
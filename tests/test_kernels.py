@@ -0,0 +1,30 @@
+import json
+import os
+import pytest
+from conftest import TESTS_DIR, instance
+
+KERNELS = ('selection', 'deposit', 'evaporation', 'reduction')
+RANKS = 2
+
+@pytest.fixture(scope='module')
+def kernel_rates(build, run):
+    binary = build('mpi', source=os.path.join(TESTS_DIR, 'kernels.c'), NUM_CITIES=256, NUM_ANTS=64,
+                   SEED=1, TSP_FILE=f'"{instance("rand256.tsp")}"')
+    return json.loads(run('mpi', binary, ranks=RANKS).strip().splitlines()[-1])
+
+@pytest.mark.perf
+@pytest.mark.parametrize('kernel', KERNELS)
+def test_kernel_throughput(kernel_rates, baseline, request, kernel):
+    key = f'{kernel}/{RANKS} ranks'
+    rate = kernel_rates[kernel]
+    assert rate > 0
+    if baseline.update:
+        baseline.set(key, rate)
+        return
+
+    expected = baseline.get(key)
+    if expected is None:
+        pytest.skip(f"No baseline for {key}, record one with --update-baseline")
+    threshold = request.config.getoption('--perf-threshold')
+    assert rate >= threshold * expected, \
+        f"{kernel} throughput {rate:.4g}/s fell below {threshold:.0%} of the baseline {expected:.4g}/s"
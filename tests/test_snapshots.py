@@ -0,0 +1,67 @@
+import os
+import sys
+import pytest
+from conftest import ROOT, instance
+
+sys.path.insert(0, ROOT)
+
+NUM_CITIES = 256
+ANTS = 4
+ITERATIONS = 80
+KEYFRAME_EVERY = 10
+
+@pytest.mark.parametrize('variant', [
+    # Trails held at the FLT_MIN floor stop matching the plain evaporation factor
+    dict(USE_FLOAT=1),
+    # MMAS clamps every trail into [tau_min, tau_max]
+    dict(UPDATE_RULE=1),
+    dict(UPDATE_RULE=1, USE_FLOAT=1),
+])
+def test_snapshot_deltas(build, run, tmp_path, variant):
+    history_module = pytest.importorskip('animators.history')
+
+    def record(name: str, keyframe_every: int):
+        directory = tmp_path / name
+        binary = build('serial', NUM_CITIES=NUM_CITIES, NUM_ANTS=ANTS, NUM_ITERATIONS=ITERATIONS, SEED=1,
+                       TSP_FILE=f'"{instance("rand256.tsp")}"', SNAPSHOTS=1, SNAPSHOT_DIR=f'"{directory}"',
+                       KEYFRAME_EVERY=keyframe_every, **variant)
+        run('serial', binary)
+        return directory, history_module.PheromoneHistory(str(directory))
+
+    directory, history = record('deltas', KEYFRAME_EVERY)
+    assert len(history) == ITERATIONS
+    # Deltas stay sparse, so no iteration fell back to a keyframe
+    assert history.keyframes == list(range(0, ITERATIONS, KEYFRAME_EVERY))
+    key_size = os.path.getsize(directory / '0.key')
+    for iteration in range(ITERATIONS):
+        if iteration % KEYFRAME_EVERY:
+            assert os.path.getsize(directory / f'{iteration}.delta') < key_size / 4
+
+    # Same seeded run with a keyframe every iteration: replay must match it bit for bit
+    _, full = record('keyframes', 1)
+    for iteration in range(ITERATIONS):
+        replayed, expected = history.pheromones(iteration), full.keyframe(iteration)
+        assert replayed.dtype == expected.dtype
+        assert (replayed == expected).all(), f"iteration {iteration} differs"
+
+def test_animator_replays_engine_snapshots(build, run, tmp_path, monkeypatch):
+    # An engine run writes ./data/snapshots only, no per-iteration tour dumps
+    pytest.importorskip('matplotlib').use('Agg')
+    animators = pytest.importorskip('animators')
+    iterations = 12
+    binary = build('serial', NUM_CITIES=36, NUM_ANTS=ANTS, NUM_ITERATIONS=iterations, SEED=1,
+                   TSP_FILE=f'"{instance("grid36.tsp")}"', SNAPSHOTS=1, KEYFRAME_EVERY=5)
+    run('serial', binary, cwd=tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    animator = animators.PheroAnimator(instance('grid36.tsp'))
+    try:
+        assert len(animator.history) == iterations
+        assert len(animator.frames) == iterations
+        for iteration in (0, 3, iterations - 1):
+            phero, ants = animator.frames[iteration]
+            assert ants is None
+            assert (phero == animator.history.pheromones(iteration)[animator.edge_index]).all()
+        assert animator.draw_update(iterations - 1)
+    finally:
+        animator.frames.close()
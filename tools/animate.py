@@ -1,9 +1,10 @@
-from animators import AntAnimator, PheroAnimator
+from animators import AntAnimator, PheroAnimator, LiveAnimator
 from matplotlib import pyplot as plt, animation
 from matplotlib.animation import FuncAnimation
 from typing import Optional, Tuple, List, Dict
 import networkx as nx
 import random
+import argparse
 import logging
 import numpy as np
 
@@ -35,10 +36,28 @@ logger.info("Node options: {}".format(NODE_OPTIONS.keys()))
 logger.info("Edge options: {}".format(EDGE_OPTIONS.keys()))
 
 if __name__ == '__main__':
-    path = 'tsplib/burma14.tsp'
-    animator = AntAnimator(path)
-    anim = animator.get_graph_animation()
-    # Save animation (Ensure ImageMagick is installed)
-    anim.save('ants.gif', writer='pillow', savefig_kwargs={'facecolor': 'white'}, fps=5)
+    parser = argparse.ArgumentParser(description="Animate ACO runs on a TSP instance.")
+    parser.add_argument('path', nargs='?', default='tsplib/burma14.tsp', help='TSP instance (default: tsplib/burma14.tsp)')
+    parser.add_argument('-m', '--mode', choices=['ants', 'phero', 'live'], default='ants',
+                        help='Replay ./data dumps (ants, phero) or follow a running engine (live)')
+    parser.add_argument('-s', '--socket', type=str, default='/tmp/aco.sock',
+                        help='Socket the engine publishes to, must match STREAM_PATH (default: /tmp/aco.sock)')
+    parser.add_argument('--fps', type=float, default=5, help='Frames per second (default: 5)')
+    parser.add_argument('-o', '--output', type=str, default='ants.gif', help='Output file for replays (default: ants.gif)')
+    args = parser.parse_args()
 
-    plt.show()
\ No newline at end of file
+    if args.mode == 'live':
+        # Bind before starting the engine, it drops snapshots while nobody listens
+        animator = LiveAnimator(args.path, args.socket, fps=args.fps)
+        anim = animator.get_graph_animation()
+        try:
+            plt.show()
+        finally:
+            animator.subscriber.close()
+    else:
+        animator = AntAnimator(args.path) if args.mode == 'ants' else PheroAnimator(args.path)
+        anim = animator.get_graph_animation()
+        # Save animation (Ensure ImageMagick is installed)
+        anim.save(args.output, writer='pillow', savefig_kwargs={'facecolor': 'white'}, fps=args.fps)
+
+        plt.show()
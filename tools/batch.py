@@ -0,0 +1,85 @@
+from animators.engine import Colony, LIB_PATH, read_tsp
+from multiprocessing import Pool
+from typing import List, NamedTuple
+import argparse
+import itertools
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+class Task(NamedTuple):
+    path: str
+    num_cities: int
+    ants: int
+    iterations: int
+    alpha: float
+    beta: float
+    evaporation: float
+    seed: int
+
+def make_tasks(paths: List[str], args) -> List[Task]:
+    """
+    Crosses every instance with every parameter set, largest instances first
+    so the long tasks do not end up alone at the tail of the queue
+    :param paths: .tsp files
+    :param args: parsed command line with the parameter lists
+    :return: list of Task
+    """
+    sizes = {path: len(read_tsp(path)) for path in paths}
+    grid = itertools.product(paths, args.ants, args.iterations, args.alpha, args.beta,
+                             args.evaporation, args.seeds)
+    tasks = [Task(path, sizes[path], *params) for path, *params in grid]
+    return sorted(tasks, key=lambda t: t.num_cities ** 2 * t.ants * t.iterations, reverse=True)
+
+def init_worker(lib_path: str):
+    # One process per core already, the library's OpenMP threads would oversubscribe
+    os.environ['OMP_NUM_THREADS'] = '1'
+    os.environ['ACO_LIB'] = lib_path
+
+def solve(task: Task) -> str:
+    """
+    Solves one instance in-process with the shared engine
+    :return: CSV result line
+    """
+    start = time.perf_counter()
+    with Colony.from_tsp(task.path, num_ants=task.ants, alpha=task.alpha, beta=task.beta,
+                         evaporation=task.evaporation, seed=task.seed,
+                         lib_path=os.environ['ACO_LIB']) as colony:
+        best_cost = colony.run(task.iterations)
+    elapsed = time.perf_counter() - start
+    name = os.path.splitext(os.path.basename(task.path))[0]
+    return (f"BATCH,{name},{task.num_cities},{task.ants},{task.iterations},{task.alpha},{task.beta},"
+            f"{task.evaporation},{task.seed},{elapsed:.6f},{best_cost:f}")
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Solve many TSP instances with the shared engine on a pool of worker processes.")
+    parser.add_argument('paths', nargs='+', help='TSP instances')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='Worker processes (default: all cores)')
+    parser.add_argument('-a', '--ants', type=int, nargs='+', default=[1024], help='Ants per iteration (default: 1024)')
+    parser.add_argument('-i', '--iterations', type=int, nargs='+', default=[10], help='Iterations (default: 10)')
+    parser.add_argument('--alpha', type=float, nargs='+', default=[4.0], help='Pheromone exponent (default: 4.0)')
+    parser.add_argument('--beta', type=float, nargs='+', default=[3.0], help='Distance exponent (default: 3.0)')
+    parser.add_argument('--evaporation', type=float, nargs='+', default=[0.9], help='Evaporation rate (default: 0.9)')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help='Seeds, one run per seed (default: 0)')
+    parser.add_argument('--lib', type=str, default=None, help='Path of libaco.so (default: $ACO_LIB or src/libaco.so)')
+    args = parser.parse_args()
+
+    lib_path = os.path.abspath(args.lib or LIB_PATH)
+    tasks = make_tasks(args.paths, args)
+    logger.info(f"{len(tasks)} tasks on {args.jobs} workers")
+
+    print("METHOD,INSTANCE,CITIES,ANTS,ITERATIONS,ALPHA,BETA,EVAPORATION,SEED,TIME,TOUR LEN", flush=True)
+    start = time.perf_counter()
+    # chunksize 1: workers pull the next task as soon as they finish one
+    with Pool(args.jobs, initializer=init_worker, initargs=(lib_path,)) as pool:
+        for line in pool.imap_unordered(solve, tasks, chunksize=1):
+            print(line, flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"{len(tasks)} instances in {elapsed:.1f}s ({len(tasks) / elapsed * 3600:.0f} per hour)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,121 @@
+import os
 import sys
 import argparse
-from itertools import product
-import random
-
-def generate_graph(size, num_nodes):
-    nodes = list(product(range(size), repeat=2))
-    
-    selected_nodes = random.sample(nodes, k=num_nodes)
-    selected_nodes = sorted(
-        selected_nodes, key=lambda x: (x[1], x[0])  # Sort by y, then x coordinate
+import numpy as np
+
+DISTRIBUTIONS = ('uniform', 'clustered', 'real')
+
+def sample_distinct(draw, num_nodes, key):
+    """
+    Rejection-samples distinct points without materializing the grid
+    :param draw: callable returning a batch of candidate points for a requested count
+    :param num_nodes: number of distinct points wanted
+    :param key: callable mapping points to a hashable 1D key (e.g. linear grid index)
+    :return: (num_nodes, 2) array of distinct points
+    """
+    points = np.empty((0, 2))
+    stalled = 0
+    while len(points) < num_nodes:
+        # Oversample a little so one round usually suffices
+        missing = num_nodes - len(points)
+        candidates = np.concatenate([points, draw(missing + missing // 10 + 16)])
+        _, first = np.unique(key(candidates), return_index=True)
+        stalled = stalled + 1 if len(first) == len(points) else 0
+        if stalled > 100:
+            raise ValueError(f"Could only place {len(points)} of {num_nodes} distinct nodes")
+        points = candidates[np.sort(first)]
+    return points[:num_nodes]
+
+def generate_graph(size, num_nodes, distribution='uniform', clusters=8, spread=0.05, rng=None):
+    """
+    Samples num_nodes distinct cities on a size x size plane
+    :param size: side of the plane, integer grid for 'uniform' and 'clustered'
+    :param num_nodes: number of cities
+    :param distribution: 'uniform' grid points, 'clustered' gaussian blobs on the grid, or 'real' uniform floats
+    :param clusters: number of blobs for 'clustered'
+    :param spread: blob standard deviation as a fraction of size for 'clustered'
+    :param rng: np.random.Generator, a fresh unseeded one by default
+    :return: (num_nodes, 2) array sorted by y, then x coordinate
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if distribution != 'real' and num_nodes > size * size:
+        raise ValueError(f"Cannot place {num_nodes} distinct nodes on a {size}x{size} grid")
+
+    def grid_key(points):
+        return points[:, 1].astype(np.int64) * size + points[:, 0].astype(np.int64)
+
+    if distribution == 'uniform':
+        def draw(k):
+            idx = rng.integers(0, size * size, size=k, dtype=np.int64)
+            return np.stack([idx % size, idx // size], axis=1)
+        nodes = sample_distinct(draw, num_nodes, grid_key)
+    elif distribution == 'clustered':
+        centers = rng.uniform(0, size, size=(clusters, 2))
+        def draw(k):
+            points = centers[rng.integers(0, clusters, size=k)] + rng.normal(0, spread * size, size=(k, 2))
+            return np.clip(np.rint(points), 0, size - 1)
+        nodes = sample_distinct(draw, num_nodes, grid_key)
+    elif distribution == 'real':
+        def draw(k):
+            return rng.uniform(0, size, size=(k, 2))
+        nodes = sample_distinct(draw, num_nodes, lambda points: points.view(np.complex128).ravel())
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    return nodes[np.lexsort((nodes[:, 0], nodes[:, 1]))]  # Sort by y, then x coordinate
+
+def write_tsp(path, nodes, comment="Generated graph with random nodes"):
+    """
+    Writes nodes as a TSPLIB EUC_2D instance in one bulk write
+    :param path: output file
+    :param nodes: (num_nodes, 2) array of coordinates
+    :param comment: COMMENT header field
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    integral = np.all(nodes == np.rint(nodes))
+    fmt = ['%d', '%d', '%d'] if integral else ['%d', '%.6f', '%.6f']
+    table = np.column_stack([np.arange(1, len(nodes) + 1), nodes])
+
+    # Keep the 6 header lines: the engines skip exactly that many
+    header = (
+        f"NAME : {name}\n"
+        f"COMMENT : {comment}\n"
+        "TYPE : TSP\n"
+        f"DIMENSION : {len(nodes)}\n"
+        "EDGE_WEIGHT_TYPE : EUC_2D\n"
+        "NODE_COORD_SECTION"
     )
-    assert len(set(selected_nodes)) == num_nodes, "Duplicate nodes were selected"
-    return selected_nodes
+    np.savetxt(path, table, fmt=fmt, delimiter='  ', header=header, footer='EOF', comments='')
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate a random graph for TSP.")
     parser.add_argument('-s', '--size', type=int, default=10, help='Size of the grid (default: 10)')
     parser.add_argument('-n', '--num_nodes', type=int, default=5, help='Number of nodes to select (default: 5)')
     parser.add_argument('-o', '--output', type=str, default='custom_graph.tsp', help='Output file name (default: custom_graph.tsp)')
+    parser.add_argument('-d', '--distribution', choices=DISTRIBUTIONS, default='uniform', help='Node distribution (default: uniform)')
+    parser.add_argument('-c', '--clusters', type=int, default=8, help='Number of clusters for the clustered distribution (default: 8)')
+    parser.add_argument('--spread', type=float, default=0.05, help='Cluster std. deviation as a fraction of the size (default: 0.05)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible instances (default: random)')
+    parser.add_argument('--count', type=int, default=1, help='Number of instances, written as <output>_<i>.tsp when > 1 (default: 1)')
     args = parser.parse_args()
 
     graph_size = args.size
     num_nodes = args.num_nodes
-    output_file = args.output
-    if graph_size <= 0 or num_nodes <= 0:
-        print("Size and number of nodes must be positive integers.")
+    if graph_size <= 0 or num_nodes <= 0 or args.count <= 0:
+        print("Size, number of nodes and count must be positive integers.")
         sys.exit(1)
-    selected_nodes = generate_graph(graph_size, num_nodes)
-
-
-    with open(output_file, 'w') as output_file:
-        output_file.write(
-            "NAME : custom_graph\n"
-            "COMMENT : Generated graph with random nodes\n"
-            "TYPE : TSP\n"
-            f"DIMENSION : {len(selected_nodes)}\n"
-            "EDGE_WEIGHT_TYPE : EUC_2D\n"
-            "NODE_COORD_SECTION\n"
-        )
-        for i, node in enumerate(selected_nodes):
-            output_file.write(f"{i+1}  {node[0]}  {node[1]}\n")
\ No newline at end of file
+
+    # Independent, reproducible streams per instance of the batch
+    seeds = np.random.SeedSequence(args.seed).spawn(args.count)
+    stem, ext = os.path.splitext(args.output)
+    for i, seed in enumerate(seeds):
+        output_file = args.output if args.count == 1 else f"{stem}_{i}{ext or '.tsp'}"
+        try:
+            selected_nodes = generate_graph(graph_size, num_nodes, args.distribution,
+                                            clusters=args.clusters, spread=args.spread,
+                                            rng=np.random.default_rng(seed))
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        write_tsp(output_file, selected_nodes,
+                  comment=f"Generated {args.distribution} graph, seed {args.seed}, instance {i}")